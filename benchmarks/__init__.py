@@ -0,0 +1 @@
+# Benchmarks das funções de dados das páginas, sem a interface do Streamlit
@@ -0,0 +1,200 @@
+# Executa os benchmarks das funções de dados das páginas e emite os resultados em JSON
+#
+# Uso, a partir da raiz do projeto:
+#   python -m benchmarks.executar --tamanhos 1000 100000 --saida resultado.json
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+# Sem rede durante os benchmarks; precisa vir antes de importar icones
+os.environ.setdefault("ALBION_ICONES_OFFLINE", "1")
+
+import pandas as pd
+
+import cache
+import database
+from benchmarks.gerador import DATA_FINAL, SEMENTE, gerar_dados
+from builds import html_build
+from config import catalogo_equipamentos, get_item_id, get_personagens
+from dataset import dataset_historico
+from series import serie_lucro
+
+TAMANHOS = (1000, 100000, 1000000)
+
+# Execuções medidas de cada caso; o relatório traz mínimo, mediana e máximo
+REPETICOES = 5
+
+TAMANHO_PAGINA = 50
+
+# Intervalo padrão das páginas (últimos 30 dias), com o último dia dos dados gerados como hoje
+INTERVALO_PADRAO = {'data_inicio': DATA_FINAL - timedelta(days=30), 'data_fim': DATA_FINAL}
+
+def _pagina_hunts_solo():
+    # carregar_dados + contagem de páginas de pages/1_🎯_Hunts_Solo.py
+    dataset_historico.contar('hunts_solo')
+    return dataset_historico.consultar('hunts_solo', limite=TAMANHO_PAGINA)
+
+def _pagina_hunts_solo_filtrada():
+    filtros = {'personagem': get_personagens()[0], 'tipo_hunt': 'HCE', **INTERVALO_PADRAO}
+    dataset_historico.contar('hunts_solo', **filtros)
+    return dataset_historico.consultar('hunts_solo', limite=TAMANHO_PAGINA, **filtros)
+
+def _analise_hunts_solo():
+    chart_data = database.resumir_hunts_solo()
+    return chart_data.pivot(index='tipo_hunt', columns='personagem', values='lucro_itens').fillna(0)
+
+def _pagina_hunts_grupo():
+    # carregar_dados e análises de pages/2_👥_Hunts_Grupo.py
+    dataset_historico.contar('hunts_grupo')
+    dados = dataset_historico.consultar('hunts_grupo', limite=TAMANHO_PAGINA)
+    database.resumir_hunts_grupo()
+    database.medias_hunts_grupo_por_personagem(get_personagens())
+    return dados
+
+def _rankings_mortes():
+    # Rankings de pages/3_💀_Mortes.py
+    dados = database.resumir_mortes()
+    dados.sort_values('mortes', ascending=False).head(10)
+    return dados.sort_values('valor_perdido', ascending=False).head(10)
+
+def _dashboard():
+    # Métricas e gráfico de main.py
+    return database.get_dashboard_summary(days=30, hoje=DATA_FINAL)
+
+def _serie_lucro():
+    # Gráfico de lucro líquido de main.py, por semana
+    return serie_lucro('semana')
+
+def _saldo():
+    # Métricas, gráfico e primeira página do extrato de pages/5_💰_Saldo.py
+    database.saldo_por_personagem(data_fim=INTERVALO_PADRAO['data_fim'])
+    database.saldo_diario(**INTERVALO_PADRAO)
+    database.contar_lancamentos(**INTERVALO_PADRAO)
+    return database.ler_extrato(limite=TAMANHO_PAGINA, **INTERVALO_PADRAO)
+
+def _saldo_personagem():
+    filtros = {'personagem': get_personagens()[0], **INTERVALO_PADRAO}
+    database.saldo_diario(**filtros)
+    database.contar_lancamentos(**filtros)
+    return database.ler_extrato(limite=TAMANHO_PAGINA, **filtros)
+
+def _builds():
+    # Lista de builds de pages/4_⚔️_Builds.py com uma página de cards abertos
+    builds = database.listar_builds().to_dict('records')
+    return [html_build(build) for build in builds[:20]]
+
+def _get_item_id():
+    # Busca de todos os nomes do catálogo
+    nomes = [item['name'] for categoria in ('armas', 'cabecas', 'armaduras', 'botas')
+             for item in catalogo_equipamentos.get_equipamentos(categoria)]
+    return [get_item_id(nome) for nome in nomes]
+
+CASOS = {
+    'hunts_solo.carregar_dados': _pagina_hunts_solo,
+    'hunts_solo.carregar_dados_filtrado': _pagina_hunts_solo_filtrada,
+    'hunts_solo.analise': _analise_hunts_solo,
+    'hunts_grupo.carregar_dados': _pagina_hunts_grupo,
+    'mortes.rankings': _rankings_mortes,
+    'main.dashboard': _dashboard,
+    'main.serie_lucro': _serie_lucro,
+    'saldo.extrato': _saldo,
+    'saldo.extrato_personagem': _saldo_personagem,
+    'builds.listar': _builds,
+    'config.get_item_id': _get_item_id,
+}
+
+def _limpar_caches():
+    cache.limpar()
+    dataset_historico.descartar()
+
+def medir(funcao, repeticoes=REPETICOES):
+    """
+    Mede a função com os caches vazios (frio) e logo após uma execução (quente).
+    Retorna os tempos em milissegundos.
+    """
+    frio = []
+    quente = []
+    for _ in range(repeticoes):
+        _limpar_caches()
+        inicio = time.perf_counter()
+        funcao()
+        frio.append((time.perf_counter() - inicio) * 1000)
+        inicio = time.perf_counter()
+        funcao()
+        quente.append((time.perf_counter() - inicio) * 1000)
+
+    def resumo(tempos):
+        return {'min': min(tempos), 'mediana': statistics.median(tempos), 'max': max(tempos)}
+
+    return {'frio_ms': resumo(frio), 'quente_ms': resumo(quente)}
+
+def executar(tamanhos=TAMANHOS, diretorio=None, repeticoes=REPETICOES, casos=None, ao_progredir=None):
+    """
+    Gera um banco sintético para cada tamanho e mede cada caso sobre ele.
+    diretorio: onde os bancos são criados (por padrão um diretório temporário);
+    o data/albion.db do projeto nunca é usado.
+    Retorna o relatório como dicionário.
+    """
+    casos = casos or list(CASOS)
+    relatorio = {
+        'gerado_em': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'pandas': pd.__version__,
+        'sqlite': database.sqlite3.sqlite_version,
+        'semente': SEMENTE,
+        'repeticoes': repeticoes,
+        'resultados': {},
+    }
+    caminho_original = database.DATABASE_PATH
+    with tempfile.TemporaryDirectory(dir=diretorio) as temporario:
+        try:
+            for tamanho in tamanhos:
+                database.DATABASE_PATH = os.path.join(temporario, f"albion_{tamanho}.db")
+                database.garantir_db()
+                inicio = time.perf_counter()
+                quantidades = gerar_dados(tamanho)
+                resultado = {
+                    'linhas': quantidades,
+                    'geracao_s': time.perf_counter() - inicio,
+                    'casos': {},
+                }
+                for nome in casos:
+                    if ao_progredir:
+                        ao_progredir(tamanho, nome)
+                    resultado['casos'][nome] = medir(CASOS[nome], repeticoes)
+                relatorio['resultados'][str(tamanho)] = resultado
+                database.fechar_pools()
+        finally:
+            database.DATABASE_PATH = caminho_original
+            _limpar_caches()
+    return relatorio
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmarks das funções de dados das páginas")
+    parser.add_argument("--tamanhos", type=int, nargs="+", default=list(TAMANHOS), help="número de hunts solo por banco")
+    parser.add_argument("--repeticoes", type=int, default=REPETICOES)
+    parser.add_argument("--casos", nargs="+", choices=sorted(CASOS), help="casos a medir (padrão: todos)")
+    parser.add_argument("--diretorio", help="diretório para os bancos temporários")
+    parser.add_argument("--saida", help="arquivo JSON de saída (padrão: stdout)")
+    args = parser.parse_args()
+
+    def ao_progredir(tamanho, caso):
+        print(f"[{tamanho}] {caso}", file=sys.stderr, flush=True)
+
+    relatorio = executar(args.tamanhos, args.diretorio, args.repeticoes, args.casos, ao_progredir)
+    texto = json.dumps(relatorio, indent=2, ensure_ascii=False)
+    if args.saida:
+        with open(args.saida, 'w', encoding='utf-8') as f:
+            f.write(texto + "\n")
+    else:
+        print(texto)
+
+if __name__ == "__main__":
+    main()
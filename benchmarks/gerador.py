@@ -0,0 +1,98 @@
+# Gerador determinístico de dados sintéticos para os benchmarks
+
+import random
+from datetime import date, timedelta
+
+from config import PERSONAGENS_INICIAIS, SLOTS_BUILD, get_equipamentos
+from database import get_db_connection, inserir_hunt_grupo
+
+# Mesma semente, mesmos dados: resultados comparáveis entre versões
+SEMENTE = 42
+
+# Último dia dos dados gerados; fixo para a geração não depender do dia em que roda.
+# Os casos dos benchmarks usam esta data como "hoje" nos filtros relativos à data atual
+DATA_FINAL = date(2026, 1, 1)
+
+# Período coberto pelos registros, em dias
+DIAS = 365
+
+TIPOS_HUNT = ("Solo", "Corrupted", "HCE")
+TIPOS_BUILD = ("PvE Solo", "PvE Grupo", "PvP Solo", "PvP Grupo", "ZvZ")
+
+# Registros inseridos por transação
+TAMANHO_LOTE = 10000
+
+# Proporção de cada tabela em relação ao número de hunts solo
+PROPORCAO_GRUPO = 0.25
+PROPORCAO_MORTES = 0.25
+MAX_BUILDS = 500
+
+def _datas(rng, dias, data_final):
+    return (data_final - timedelta(days=rng.randrange(dias))).isoformat()
+
+def _em_lotes(conn, linhas, gravar):
+    lote = []
+    for linha in linhas:
+        lote.append(linha)
+        if len(lote) >= TAMANHO_LOTE:
+            gravar(conn.cursor(), lote)
+            conn.commit()
+            lote = []
+    if lote:
+        gravar(conn.cursor(), lote)
+        conn.commit()
+
+def _gravar_hunts_grupo(cursor, lote):
+    # Cada hunt precisa do próprio id para os participantes
+    for data, personagens, valor_total, observacoes in lote:
+        inserir_hunt_grupo(cursor, data, personagens, valor_total, observacoes)
+
+def gerar_dados(n, semente=SEMENTE, dias=DIAS, data_final=DATA_FINAL):
+    """
+    Preenche o banco atual (database.banco_atual()) com n hunts solo e, na mesma proporção,
+    hunts em grupo, mortes e builds dos personagens de config.PERSONAGENS_INICIAIS
+    (o cadastro de personagens de um banco de guilda novo começa vazio).
+    Retorna a quantidade gerada por tabela.
+    """
+    rng = random.Random(semente)
+    personagens = list(PERSONAGENS_INICIAIS)
+    quantidades = {
+        'hunts_solo': n,
+        'hunts_grupo': int(n * PROPORCAO_GRUPO),
+        'mortes': int(n * PROPORCAO_MORTES),
+        'builds': min(MAX_BUILDS, max(1, n // 100)),
+    }
+
+    hunts_solo = (
+        (_datas(rng, dias, data_final), rng.choice(personagens), rng.choice(TIPOS_HUNT),
+         rng.randrange(10, 5000) * 1000, None)
+        for _ in range(quantidades['hunts_solo'])
+    )
+    mortes = (
+        (_datas(rng, dias, data_final), rng.choice(personagens), rng.randrange(1, 3000) * 1000, None)
+        for _ in range(quantidades['mortes'])
+    )
+    hunts_grupo = (
+        (_datas(rng, dias, data_final), rng.sample(personagens, rng.randint(2, min(5, len(personagens)))),
+         rng.randrange(100, 20000) * 1000, None)
+        for _ in range(quantidades['hunts_grupo'])
+    )
+
+    equipamentos = [[item['id'] for item in get_equipamentos(categoria)] or [''] for categoria in SLOTS_BUILD.values()]
+    builds = (
+        (f"Build {i}", rng.choice(TIPOS_BUILD), rng.choice(personagens),
+         *(rng.choice(ids) for ids in equipamentos), None)
+        for i in range(quantidades['builds'])
+    )
+
+    with get_db_connection() as conn:
+        _em_lotes(conn, hunts_solo, lambda cursor, lote: cursor.executemany(
+            "INSERT INTO hunts_solo (data, personagem, tipo_hunt, lucro_itens, descricao) VALUES (?, ?, ?, ?, ?)", lote))
+        _em_lotes(conn, mortes, lambda cursor, lote: cursor.executemany(
+            "INSERT INTO mortes (data, personagem, valor_perdido, descricao) VALUES (?, ?, ?, ?)", lote))
+        _em_lotes(conn, hunts_grupo, _gravar_hunts_grupo)
+        _em_lotes(conn, builds, lambda cursor, lote: cursor.executemany(f"""
+            INSERT INTO builds (nome, tipo, personagem, {', '.join(SLOTS_BUILD)}, notas)
+            VALUES ({', '.join('?' for _ in range(len(SLOTS_BUILD) + 4))})
+        """, lote))
+    return quantidades
@@ -0,0 +1,57 @@
+# Montagem dos cards da página de Builds
+
+import functools
+import html
+
+from config import get_item_nome
+from icones import loja_icones, url_icone
+
+def _slot_equipamento(item_id, titulo, alt=None):
+    # Data URI do cache local de ícones: nenhuma requisição de imagem por slot
+    src = url_icone(item_id)
+    alt_html = f' alt="{html.escape(alt)}"' if alt is not None else ''
+    return f"""
+                    <div class="equipment-item">
+                        <img class="equipment-img" src="{src}"{alt_html}>
+                        <div class="tooltip-trigger" title="{html.escape(titulo)}"></div>
+                    </div>"""
+
+@functools.lru_cache(maxsize=512)
+def html_grade_build(build_id, atualizado_em, geracao_icones, arma, secundaria, cabeca, peito, botas, capa, potion, food):
+    """
+    HTML da grade 3x3 de equipamentos de uma build (os slots recebem IDs de itens).
+    Memorizado por id, data da última alteração e geração do cache de ícones, então cada card
+    é montado uma vez por versão da build e refeito quando um ícone que faltava chega ao cache.
+    """
+    def slot(item_id):
+        nome = get_item_nome(item_id) or 'Nenhuma'
+        return _slot_equipamento(item_id, nome, nome)
+
+    # Sem item secundário, a arma de duas mãos ocupa o slot
+    slots = [
+        _slot_equipamento('T8_BAG@4', 'Mochila'),
+        slot(cabeca),
+        slot(capa),
+        slot(arma),
+        slot(peito),
+        slot(secundaria or arma),
+        slot(potion),
+        slot(botas),
+        slot(food),
+    ]
+    return f"""
+            <div class="build-card">
+                <div class="equipment-section">{''.join(slots)}
+                </div>
+            </div>
+            """
+
+def html_build(build):
+    """HTML da grade de equipamentos a partir de um registro da tabela builds"""
+    return html_grade_build(
+        build['id'],
+        build.get('updated_at') or build.get('created_at'),
+        loja_icones.geracao,
+        build['arma'], build['secundaria'], build['cabeca'], build['peito'],
+        build['botas'], build['capa'], build['potion'], build['food'],
+    )
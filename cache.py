@@ -0,0 +1,102 @@
+# Cache em memória das consultas das páginas, compartilhado por todas as sessões do processo
+
+import functools
+import threading
+import time
+from collections import OrderedDict
+
+# Tempo de vida padrão de uma entrada, em segundos
+TTL_PADRAO = 300
+
+# Número máximo de entradas; acima disso as menos usadas recentemente são descartadas
+TAMANHO_MAXIMO = 256
+
+_lock = threading.Lock()
+# (escopo, tabela) -> geração; cada escrita na tabela incrementa a sua geração
+_geracoes = {}
+# chave -> (expira_em, tabelas com escopo, valor), em ordem de uso (a mais recente no fim)
+_entradas = OrderedDict()
+
+# Função que identifica o banco em uso (database registra o roteador de guildas);
+# gerações e entradas de bancos diferentes nunca se misturam
+def _escopo():
+    return None
+
+def definir_escopo(funcao):
+    """Registra a função que devolve o escopo (banco) atual"""
+    global _escopo
+    _escopo = funcao
+
+def geracao(tabela):
+    """Retorna a geração atual de uma tabela no escopo atual"""
+    return _geracoes.get((_escopo(), tabela), 0)
+
+def invalidar(*tabelas):
+    """
+    Registra escrita nas tabelas informadas, no escopo atual.
+    Incrementa a geração de cada uma e descarta só as entradas que dependem delas.
+    """
+    escopo = _escopo()
+    tabelas = {(escopo, tabela) for tabela in tabelas}
+    with _lock:
+        for tabela in tabelas:
+            _geracoes[tabela] = _geracoes.get(tabela, 0) + 1
+        afetadas = [chave for chave, (_, dependencias, _) in _entradas.items()
+                    if not dependencias.isdisjoint(tabelas)]
+        for chave in afetadas:
+            del _entradas[chave]
+
+def limpar():
+    """Descarta todas as entradas do cache"""
+    with _lock:
+        _entradas.clear()
+
+def _congelar(valor):
+    # Listas, dicts e sets viram equivalentes imutáveis para poderem compor a chave
+    if isinstance(valor, (list, tuple)):
+        return tuple(_congelar(v) for v in valor)
+    if isinstance(valor, dict):
+        return tuple(sorted((k, _congelar(v)) for k, v in valor.items()))
+    if isinstance(valor, (set, frozenset)):
+        return frozenset(valor)
+    return valor
+
+def cache_consulta(*tabelas, ttl=TTL_PADRAO):
+    """
+    Decorator que guarda o resultado da função por argumentos e geração das tabelas.
+    tabelas: tabelas de que o resultado depende; se omitidas, o primeiro argumento
+    posicional da função é o nome da tabela.
+    O valor devolvido é compartilhado entre as chamadas e não deve ser alterado.
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            escopo = _escopo()
+            dependencias = frozenset((escopo, tabela) for tabela in (tabelas or args[:1]))
+            chave = (
+                func.__module__,
+                func.__qualname__,
+                escopo,
+                _congelar(args),
+                _congelar(kwargs),
+                tuple(sorted((tabela, _geracoes.get(tabela, 0)) for tabela in dependencias)),
+            )
+            agora = time.monotonic()
+            with _lock:
+                entrada = _entradas.get(chave)
+                if entrada is not None and entrada[0] > agora:
+                    _entradas.move_to_end(chave)
+                    return entrada[2]
+
+            valor = func(*args, **kwargs)
+
+            with _lock:
+                # Só guarda se nenhuma escrita aconteceu durante a consulta
+                if all(_geracoes.get(tabela, 0) == g for tabela, g in chave[5]):
+                    _entradas[chave] = (agora + ttl, dependencias, valor)
+                    _entradas.move_to_end(chave)
+                    while len(_entradas) > TAMANHO_MAXIMO:
+                        _entradas.popitem(last=False)
+            return valor
+        return wrapper
+    return decorator
@@ -2,40 +2,168 @@
 
 import os
 import json
+import threading
+from collections import namedtuple
+from types import MappingProxyType
+
+# Personagens cadastrados na criação do banco padrão (data/albion.db); depois a lista fica na tabela personagens
+PERSONAGENS_INICIAIS = ("Przdecenoura", "CapetadeCenoura", "GordoDeCenoura", "FantasiaVH", "MagoRossi", "DPSdecenoura", "Rlove", "Digeon")
 
 def get_personagens():
-    """Retorna a lista de personagens disponíveis"""
-    return ["Przdecenoura", "CapetadeCenoura", "GordoDeCenoura", "FantasiaVH", "MagoRossi", "DPSdecenoura", "Rlove", "Digeon"]
+    """Retorna a tupla de personagens cadastrados no banco da guilda atual, na ordem de exibição"""
+    # Import tardio: database importa config
+    from database import obter_personagens
+    return obter_personagens().nomes
+
+def get_indice_personagem(nome):
+    """Posição do personagem em get_personagens(), ou 0 se não estiver cadastrado"""
+    from database import obter_personagens
+    return obter_personagens().posicoes.get(nome, 0)
+
+# Categorias de equipamentos, na ordem usada para resolver nomes repetidos
+CATEGORIAS_EQUIPAMENTOS = ('armas', 'cabecas', 'armaduras', 'botas', 'capas', 'pocoes', 'comidas', 'secundaria')
+
+ARQUIVO_EQUIPAMENTOS = "data/equipment_mapping.json"
+
+# Opções prontas para o selectbox de uma categoria: IDs ('' primeiro, a opção vazia),
+# ID -> nome e ID -> índice em ids. Tudo imutável, compartilhado entre sessões.
+OpcoesEquipamento = namedtuple('OpcoesEquipamento', ['ids', 'nomes', 'indices'])
+
+OPCOES_VAZIAS = OpcoesEquipamento(('',), MappingProxyType({'': ''}), MappingProxyType({'': 0}))
+
+class EquipmentCatalog:
+    """
+    Catálogo de equipamentos em memória.
+    Lê o equipment_mapping.json uma única vez e mantém índices por nome, ID e categoria.
+    Recarrega automaticamente quando o mtime do arquivo muda.
+    """
+
+    def __init__(self, arquivo=ARQUIVO_EQUIPAMENTOS):
+        self.arquivo = arquivo
+        self._lock = threading.Lock()
+        self._mtime = None
+        self._por_categoria = {}
+        self._por_nome = {}
+        self._por_id = {}
+        self._nome_por_categoria = {}
+        self._opcoes_por_categoria = {}
+
+    def _verificar_atualizacao(self):
+        try:
+            mtime = os.stat(self.arquivo).st_mtime_ns
+        except OSError:
+            mtime = None
+        if mtime == self._mtime:
+            return
+        with self._lock:
+            if mtime != self._mtime:
+                self._carregar(mtime)
+
+    def _carregar(self, mtime):
+        por_categoria = {}
+        por_nome = {}
+        por_id = {}
+        nome_por_categoria = {}
+        opcoes_por_categoria = {}
+        try:
+            with open(self.arquivo, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            for categoria in CATEGORIAS_EQUIPAMENTOS:
+                items = sorted(data.get(categoria, []), key=lambda x: x['name'])
+                por_categoria[categoria] = items
+                nome_por_categoria[categoria] = {}
+                nomes = {'': ''}
+                indices = {'': 0}
+                for posicao, item in enumerate(items, start=1):
+                    nome_por_categoria[categoria].setdefault(item['name'], item)
+                    nomes.setdefault(item['id'], item['name'])
+                    indices.setdefault(item['id'], posicao)
+                    # Em caso de nome/ID repetido vale a primeira categoria, como na busca antiga
+                    por_nome.setdefault(item['name'], item)
+                    por_id.setdefault(item['id'], item)
+                opcoes_por_categoria[categoria] = OpcoesEquipamento(
+                    ('',) + tuple(item['id'] for item in items),
+                    MappingProxyType(nomes),
+                    MappingProxyType(indices),
+                )
+        except Exception as e:
+            print(f"Erro ao ler arquivo {self.arquivo}: {str(e)}")
+        # Troca os índices de uma vez para que leitores concorrentes nunca vejam um estado parcial
+        self._por_categoria = por_categoria
+        self._por_nome = por_nome
+        self._por_id = por_id
+        self._nome_por_categoria = nome_por_categoria
+        self._opcoes_por_categoria = opcoes_por_categoria
+        self._mtime = mtime
+
+    def get_equipamentos(self, tipo):
+        """Retorna a lista de equipamentos (dicionários com nome e id) de uma categoria, ordenada por nome"""
+        self._verificar_atualizacao()
+        return list(self._por_categoria.get(tipo, []))
+
+    def get_item_id(self, nome, categoria=None):
+        """
+        Retorna o ID do Albion a partir do nome do item, ou None se não existir.
+        Com a categoria informada, nomes repetidos em outras categorias não atrapalham.
+        """
+        if not nome:
+            return None
+        self._verificar_atualizacao()
+        item = self._nome_por_categoria.get(categoria, {}).get(nome) or self._por_nome.get(nome)
+        return item['id'] if item else None
+
+    def get_item_nome(self, item_id):
+        """Retorna o nome do item a partir do ID do Albion, ou None se não existir"""
+        if not item_id:
+            return None
+        self._verificar_atualizacao()
+        item = self._por_id.get(item_id)
+        return item['name'] if item else None
+
+    def get_posicao(self, categoria, item_id):
+        """Retorna a posição do item na lista ordenada da categoria, ou None se não existir"""
+        if not item_id:
+            return None
+        indice = self.get_opcoes(categoria).indices.get(item_id)
+        return None if indice is None else indice - 1
+
+    def get_opcoes(self, categoria):
+        """Retorna as opções (OpcoesEquipamento) de uma categoria, montadas na carga do catálogo"""
+        self._verificar_atualizacao()
+        return self._opcoes_por_categoria.get(categoria, OPCOES_VAZIAS)
+
+# Catálogo compartilhado por todas as páginas e sessões do processo
+catalogo_equipamentos = EquipmentCatalog()
 
 def get_equipamentos(tipo):
     """
-    Lê equipamentos do arquivo equipment_mapping.json
+    Retorna equipamentos do catálogo carregado de equipment_mapping.json
     tipo: 'armas', 'cabecas', 'armaduras', 'botas', 'capas', 'pocoes', 'comidas', 'secundaria'
     """
-    arquivo = "data/equipment_mapping.json"
-    try:
-        with open(arquivo, 'r', encoding='utf-8') as f:
-            data = json.load(f)
-            # Mapeia os tipos em português para as chaves do JSON
-            tipo_map = {
-                'cabecas': 'cabecas',
-                'armaduras': 'armaduras',
-                'botas': 'botas',
-                'armas': 'armas',
-                'secundaria': 'secundaria',
-                'capas': 'capas',
-                'pocoes': 'pocoes',
-                'comidas': 'comidas'
-            }
-            
-            # Pega os items da categoria correta
-            items = data.get(tipo_map[tipo], [])
-            # Retorna lista de dicionários com nome e id
-            return sorted(items, key=lambda x: x['name'])
-            
-    except Exception as e:
-        print(f"Erro ao ler arquivo {arquivo}: {str(e)}")
-        return []
+    return catalogo_equipamentos.get_equipamentos(tipo)
+
+def get_item_id(item_name):
+    """Converte o nome de um item para o ID do Albion"""
+    return catalogo_equipamentos.get_item_id(item_name)
+
+def get_item_nome(item_id):
+    """
+    Converte o ID do Albion para o nome do item.
+    Valores que não são IDs do catálogo (builds antigas) são devolvidos como estão.
+    """
+    return catalogo_equipamentos.get_item_nome(item_id) or item_id
+
+# Coluna da tabela builds -> categoria de equipamentos
+SLOTS_BUILD = {
+    'arma': 'armas',
+    'secundaria': 'secundaria',
+    'cabeca': 'cabecas',
+    'peito': 'armaduras',
+    'botas': 'botas',
+    'capa': 'capas',
+    'potion': 'pocoes',
+    'food': 'comidas',
+}
 
 # Outras configurações globais podem ser adicionadas aqui
 PAGINA_TITULO = "Albion Stats"
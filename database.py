@@ -1,19 +1,172 @@
 import sqlite3
 import os
+import queue
+import re
+import threading
+import contextvars
+from collections import namedtuple
+from types import MappingProxyType
+import pandas as pd
 from contextlib import contextmanager
+from urllib.request import pathname2url
+import instrumentacao
+from cache import cache_consulta, definir_escopo, invalidar
+from config import PERSONAGENS_INICIAIS, SLOTS_BUILD, catalogo_equipamentos
 
 DATABASE_PATH = 'data/albion.db'
 
+# Um banco (shard) por guilda neste diretório; sem guilda selecionada vale DATABASE_PATH
+DIRETORIO_GUILDAS = 'data/guildas'
+
+_NOME_GUILDA = re.compile(r'^[A-Za-z0-9_-]{1,64}$')
+
+# Guilda da sessão atual. Cada sessão do Streamlit roda no seu próprio thread,
+# então o valor definido por uma página não vaza para as outras sessões.
+_guilda_atual = contextvars.ContextVar('guilda_atual', default=None)
+
+def caminho_banco(guilda=None):
+    """Arquivo de banco de uma guilda (None: o banco padrão)"""
+    if not guilda:
+        return DATABASE_PATH
+    if not _NOME_GUILDA.match(guilda):
+        raise ValueError(f"Nome de guilda inválido: {guilda!r}")
+    return os.path.join(DIRETORIO_GUILDAS, f"{guilda}.db")
+
+def usar_guilda(guilda):
+    """Roteia as próximas operações de banco deste thread/sessão para o shard da guilda"""
+    caminho_banco(guilda)
+    _guilda_atual.set(guilda or None)
+
+def guilda_atual():
+    return _guilda_atual.get()
+
 @contextmanager
-def get_db_connection():
-    conn = sqlite3.connect(DATABASE_PATH)
+def na_guilda(guilda):
+    """Executa o bloco no shard da guilda e depois volta à guilda anterior"""
+    caminho_banco(guilda)
+    token = _guilda_atual.set(guilda or None)
+    try:
+        yield
+    finally:
+        _guilda_atual.reset(token)
+
+def banco_atual():
+    """Caminho absoluto do banco da guilda atual; chave de pools, inicialização e cache"""
+    return os.path.abspath(caminho_banco(_guilda_atual.get()))
+
+def listar_guildas():
+    """Guildas com shard criado, em ordem alfabética"""
+    try:
+        arquivos = os.listdir(DIRETORIO_GUILDAS)
+    except OSError:
+        return []
+    return sorted(nome[:-3] for nome in arquivos if nome.endswith('.db') and _NOME_GUILDA.match(nome[:-3]))
+
+def criar_guilda(guilda):
+    """Cria o shard da guilda com o schema completo; só a ação explícita de criar guilda deve chamar isto"""
+    if not guilda:
+        raise ValueError("Informe o nome da guilda")
+    with na_guilda(guilda):
+        garantir_db()
+
+# Entradas e gerações do cache são separadas por banco
+definir_escopo(banco_atual)
+
+# PRAGMAs aplicados uma única vez em cada conexão nova do pool
+PRAGMAS_CONEXAO = (
+    "PRAGMA synchronous = NORMAL",
+    "PRAGMA cache_size = -16000",  # ~16 MB de cache de páginas por conexão
+    "PRAGMA mmap_size = 268435456",  # 256 MB mapeados em memória
+    "PRAGMA busy_timeout = 5000",
+)
+
+# Conexões ociosas mantidas por pool; acima disso as devolvidas são fechadas
+TAMANHO_POOL = 8
+
+class PoolConexoes:
+    """
+    Pool thread-safe de conexões SQLite para um arquivo de banco.
+    As conexões são compartilhadas entre as sessões do Streamlit e cada
+    uma recebe os PRAGMAs só quando é criada.
+    """
+
+    def __init__(self, caminho, somente_leitura=False, tamanho=TAMANHO_POOL):
+        self.caminho = caminho
+        self.somente_leitura = somente_leitura
+        self._livres = queue.LifoQueue(maxsize=tamanho)
+
+    def _nova_conexao(self):
+        # Com a instrumentação ligada cada comando é medido (ver instrumentacao.py)
+        fabrica = instrumentacao.ConexaoInstrumentada if instrumentacao.ATIVA else sqlite3.Connection
+        if self.somente_leitura:
+            uri = f"file:{pathname2url(self.caminho)}?mode=ro"
+            conn = sqlite3.connect(uri, uri=True, check_same_thread=False, factory=fabrica)
+        else:
+            conn = sqlite3.connect(self.caminho, check_same_thread=False, factory=fabrica)
+            # WAL fica gravado no arquivo; leitores não bloqueiam mais as escritas
+            conn.execute("PRAGMA journal_mode = WAL")
+        for pragma in PRAGMAS_CONEXAO:
+            conn.execute(pragma)
+        return conn
+
+    def obter(self):
+        try:
+            return self._livres.get_nowait()
+        except queue.Empty:
+            return self._nova_conexao()
+
+    def devolver(self, conn):
+        # Descarta o que ficou sem commit para a próxima sessão receber a conexão limpa
+        if conn.in_transaction:
+            conn.rollback()
+        try:
+            self._livres.put_nowait(conn)
+        except queue.Full:
+            conn.close()
+
+    def fechar(self):
+        while True:
+            try:
+                self._livres.get_nowait().close()
+            except queue.Empty:
+                return
+
+# Pools por (arquivo de banco, somente_leitura); cada guilda tem os seus
+_pools = {}
+_pools_lock = threading.Lock()
+
+def _obter_pool(somente_leitura):
+    chave = (banco_atual(), somente_leitura)
+    pool = _pools.get(chave)
+    if pool is None:
+        with _pools_lock:
+            pool = _pools.get(chave)
+            if pool is None:
+                pool = _pools[chave] = PoolConexoes(chave[0], somente_leitura)
+    return pool
+
+def fechar_pools():
+    """Fecha as conexões ociosas de todos os pools, por exemplo antes de apagar um arquivo de banco"""
+    with _pools_lock:
+        for pool in _pools.values():
+            pool.fechar()
+        _pools.clear()
+
+@contextmanager
+def get_db_connection(somente_leitura=False):
+    """
+    Empresta uma conexão do pool.
+    somente_leitura=True usa conexões abertas em modo read-only, para consultas de dashboard.
+    """
+    pool = _obter_pool(somente_leitura)
+    conn = pool.obter()
     try:
         yield conn
     finally:
-        conn.close()
+        pool.devolver(conn)
 
 def init_db():
-    os.makedirs('data', exist_ok=True)
+    os.makedirs(os.path.dirname(banco_atual()), exist_ok=True)
     with get_db_connection() as conn:
         cursor = conn.cursor()
         
@@ -73,12 +226,907 @@ def init_db():
         
         conn.commit()
 
-def upgrade_db():
-    with get_db_connection() as conn:
-        cursor = conn.cursor()
+        migrar_db(conn)
+
+        # Builds que ficaram com nomes porque o catálogo não estava disponível na migração
+        if converter_builds_ids_itens(conn.cursor()):
+            conn.commit()
+
+# Migrações de schema, aplicadas em ordem uma única vez.
+# A posição na lista (a partir de 1) é a versão gravada em PRAGMA user_version.
+
+def _migracao_coluna_secundaria(cursor):
+    colunas = {linha[1] for linha in cursor.execute("PRAGMA table_info(builds)")}
+    if 'secundaria' not in colunas:
+        cursor.execute('ALTER TABLE builds ADD COLUMN secundaria TEXT')
+
+def _migracao_indices(cursor):
+    # Índices por data cobrem as colunas agregadas, evitando leitura da tabela
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_hunts_solo_data ON hunts_solo (data, personagem, tipo_hunt, lucro_itens)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_hunts_solo_personagem_data ON hunts_solo (personagem, data)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_hunts_solo_tipo_data ON hunts_solo (tipo_hunt, data)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_hunts_grupo_data ON hunts_grupo (data, valor_total)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_mortes_data ON mortes (data, personagem, valor_perdido)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_mortes_personagem_data ON mortes (personagem, data)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_builds_tipo_nome ON builds (tipo, nome)')
+
+def separar_personagens(personagens):
+    """Converte a string "A, B, C" (ou uma lista) em uma lista de nomes sem repetição"""
+    if isinstance(personagens, str):
+        personagens = personagens.split(',')
+    nomes = []
+    for nome in personagens:
+        nome = nome.strip()
+        if nome and nome not in nomes:
+            nomes.append(nome)
+    return nomes
+
+def _migracao_participantes_grupo(cursor):
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS hunt_grupo_participantes (
+        hunt_id INTEGER NOT NULL REFERENCES hunts_grupo (id),
+        personagem TEXT NOT NULL,
+        PRIMARY KEY (hunt_id, personagem)
+    )
+    ''')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_participantes_personagem ON hunt_grupo_participantes (personagem, hunt_id)')
+    cursor.execute('ALTER TABLE hunts_grupo ADD COLUMN num_participantes INTEGER NOT NULL DEFAULT 1')
+
+    # Apagar uma hunt apaga também seus participantes
+    cursor.execute('''
+    CREATE TRIGGER IF NOT EXISTS trg_hunts_grupo_apagar_participantes
+    BEFORE DELETE ON hunts_grupo
+    BEGIN
+        DELETE FROM hunt_grupo_participantes WHERE hunt_id = OLD.id;
+    END
+    ''')
+
+    # Preencher a partir das strings já gravadas
+    hunts = cursor.execute('SELECT id, personagens FROM hunts_grupo').fetchall()
+    cursor.executemany(
+        'INSERT OR IGNORE INTO hunt_grupo_participantes (hunt_id, personagem) VALUES (?, ?)',
+        ((hunt_id, nome) for hunt_id, personagens in hunts for nome in separar_personagens(personagens))
+    )
+    cursor.execute('''
+    UPDATE hunts_grupo SET num_participantes = MAX(1, (
+        SELECT COUNT(*) FROM hunt_grupo_participantes WHERE hunt_id = hunts_grupo.id
+    ))
+    ''')
+
+    cursor.execute('DROP INDEX IF EXISTS idx_hunts_grupo_data')
+    cursor.execute('CREATE INDEX idx_hunts_grupo_data ON hunts_grupo (data, num_participantes, valor_total)')
+
+def _migracao_estatisticas_diarias(cursor):
+    # Agregados por dia, personagem e categoria ('solo', 'grupo' ou 'morte').
+    # detalhe guarda o tipo_hunt nas hunts solo e o número de participantes nas hunts em grupo.
+    # Nas hunts em grupo cada participante recebe sua cota (valor_total / num_participantes).
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS estatisticas_diarias (
+        data DATE NOT NULL,
+        personagem TEXT NOT NULL,
+        categoria TEXT NOT NULL,
+        detalhe TEXT NOT NULL DEFAULT '',
+        quantidade INTEGER NOT NULL DEFAULT 0,
+        valor REAL NOT NULL DEFAULT 0,
+        PRIMARY KEY (data, personagem, categoria, detalhe)
+    )
+    ''')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_estatisticas_categoria_data ON estatisticas_diarias (categoria, data)')
+
+    # Triggers que mantêm os agregados a cada insert/delete nas tabelas de fatos
+    cursor.execute('''
+    CREATE TRIGGER IF NOT EXISTS trg_hunts_solo_estatisticas_inserir
+    AFTER INSERT ON hunts_solo
+    BEGIN
+        INSERT INTO estatisticas_diarias (data, personagem, categoria, detalhe, quantidade, valor)
+        VALUES (NEW.data, NEW.personagem, 'solo', NEW.tipo_hunt, 1, NEW.lucro_itens)
+        ON CONFLICT (data, personagem, categoria, detalhe)
+        DO UPDATE SET quantidade = quantidade + 1, valor = valor + excluded.valor;
+    END
+    ''')
+    cursor.execute('''
+    CREATE TRIGGER IF NOT EXISTS trg_hunts_solo_estatisticas_apagar
+    AFTER DELETE ON hunts_solo
+    BEGIN
+        UPDATE estatisticas_diarias SET quantidade = quantidade - 1, valor = valor - OLD.lucro_itens
+        WHERE data = OLD.data AND personagem = OLD.personagem AND categoria = 'solo' AND detalhe = OLD.tipo_hunt;
+        DELETE FROM estatisticas_diarias
+        WHERE data = OLD.data AND personagem = OLD.personagem AND categoria = 'solo' AND detalhe = OLD.tipo_hunt
+          AND quantidade <= 0;
+    END
+    ''')
+    cursor.execute('''
+    CREATE TRIGGER IF NOT EXISTS trg_mortes_estatisticas_inserir
+    AFTER INSERT ON mortes
+    BEGIN
+        INSERT INTO estatisticas_diarias (data, personagem, categoria, detalhe, quantidade, valor)
+        VALUES (NEW.data, NEW.personagem, 'morte', '', 1, NEW.valor_perdido)
+        ON CONFLICT (data, personagem, categoria, detalhe)
+        DO UPDATE SET quantidade = quantidade + 1, valor = valor + excluded.valor;
+    END
+    ''')
+    cursor.execute('''
+    CREATE TRIGGER IF NOT EXISTS trg_mortes_estatisticas_apagar
+    AFTER DELETE ON mortes
+    BEGIN
+        UPDATE estatisticas_diarias SET quantidade = quantidade - 1, valor = valor - OLD.valor_perdido
+        WHERE data = OLD.data AND personagem = OLD.personagem AND categoria = 'morte' AND detalhe = '';
+        DELETE FROM estatisticas_diarias
+        WHERE data = OLD.data AND personagem = OLD.personagem AND categoria = 'morte' AND detalhe = ''
+          AND quantidade <= 0;
+    END
+    ''')
+    # Nas hunts em grupo os triggers ficam nos participantes, que são inseridos depois da hunt
+    # e apagados antes dela (trg_hunts_grupo_apagar_participantes), então a hunt sempre existe aqui
+    cursor.execute('''
+    CREATE TRIGGER IF NOT EXISTS trg_participantes_estatisticas_inserir
+    AFTER INSERT ON hunt_grupo_participantes
+    BEGIN
+        INSERT INTO estatisticas_diarias (data, personagem, categoria, detalhe, quantidade, valor)
+        SELECT data, NEW.personagem, 'grupo', CAST(num_participantes AS TEXT), 1, valor_total * 1.0 / num_participantes
+        FROM hunts_grupo WHERE id = NEW.hunt_id
+        ON CONFLICT (data, personagem, categoria, detalhe)
+        DO UPDATE SET quantidade = quantidade + 1, valor = valor + excluded.valor;
+    END
+    ''')
+    cursor.execute('''
+    CREATE TRIGGER IF NOT EXISTS trg_participantes_estatisticas_apagar
+    AFTER DELETE ON hunt_grupo_participantes
+    BEGIN
+        UPDATE estatisticas_diarias
+        SET quantidade = quantidade - 1,
+            valor = valor - (SELECT valor_total * 1.0 / num_participantes FROM hunts_grupo WHERE id = OLD.hunt_id)
+        WHERE personagem = OLD.personagem AND categoria = 'grupo'
+          AND (data, detalhe) = (SELECT data, CAST(num_participantes AS TEXT) FROM hunts_grupo WHERE id = OLD.hunt_id);
+        DELETE FROM estatisticas_diarias
+        WHERE personagem = OLD.personagem AND categoria = 'grupo' AND quantidade <= 0
+          AND (data, detalhe) = (SELECT data, CAST(num_participantes AS TEXT) FROM hunts_grupo WHERE id = OLD.hunt_id);
+    END
+    ''')
+
+    # Preencher com o que já existe
+    cursor.execute('''
+    INSERT OR REPLACE INTO estatisticas_diarias (data, personagem, categoria, detalhe, quantidade, valor)
+    SELECT data, personagem, 'solo', tipo_hunt, COUNT(*), SUM(lucro_itens)
+    FROM hunts_solo GROUP BY data, personagem, tipo_hunt
+    ''')
+    cursor.execute('''
+    INSERT OR REPLACE INTO estatisticas_diarias (data, personagem, categoria, detalhe, quantidade, valor)
+    SELECT data, personagem, 'morte', '', COUNT(*), SUM(valor_perdido)
+    FROM mortes GROUP BY data, personagem
+    ''')
+    cursor.execute('''
+    INSERT OR REPLACE INTO estatisticas_diarias (data, personagem, categoria, detalhe, quantidade, valor)
+    SELECT h.data, p.personagem, 'grupo', CAST(h.num_participantes AS TEXT), COUNT(*), SUM(h.valor_total * 1.0 / h.num_participantes)
+    FROM hunts_grupo h JOIN hunt_grupo_participantes p ON p.hunt_id = h.id
+    GROUP BY h.data, p.personagem, h.num_participantes
+    ''')
+
+def _migracao_importacoes(cursor):
+    # Progresso das importações em lote (importacao.py), para retomar após falhas
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS importacoes (
+        arquivo TEXT NOT NULL,
+        tabela TEXT NOT NULL,
+        linhas INTEGER NOT NULL,
+        atualizado_em TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        PRIMARY KEY (arquivo, tabela)
+    )
+    ''')
+
+def _migracao_builds_atualizado_em(cursor):
+    # Data da última alteração, usada para memorizar os cards da página de Builds
+    cursor.execute('ALTER TABLE builds ADD COLUMN updated_at TIMESTAMP')
+    cursor.execute('UPDATE builds SET updated_at = created_at')
+
+def converter_builds_ids_itens(cursor):
+    """
+    Troca pelo ID do item os nomes que ainda estiverem nos slots das builds
+    (ex.: T4_HEAD_PLATE_SET1 em vez do nome). Valores que já são IDs ou que não existem
+    no catálogo ficam como estão. Sem o catálogo carregado não faz nada.
+    Retorna quantas builds foram alteradas.
+    """
+    if not catalogo_equipamentos.get_equipamentos('armas'):
+        return 0
+    alteradas = []
+    for build_id, *valores in cursor.execute(f"SELECT id, {', '.join(SLOTS_BUILD)} FROM builds").fetchall():
+        ids = []
+        for (coluna, categoria), valor in zip(SLOTS_BUILD.items(), valores):
+            if valor and catalogo_equipamentos.get_posicao(categoria, valor) is None:
+                valor = catalogo_equipamentos.get_item_id(valor, categoria) or valor
+            ids.append(valor)
+        if ids != valores:
+            alteradas.append((*ids, build_id))
+    atribuicoes = ", ".join(f"{coluna} = ?" for coluna in SLOTS_BUILD)
+    cursor.executemany(f"UPDATE builds SET {atribuicoes} WHERE id = ?", alteradas)
+    return len(alteradas)
+
+def _migracao_builds_ids_itens(cursor):
+    # Os slots das builds passam a guardar o ID do item em vez do nome.
+    # Sem o equipment_mapping.json a conversão não trava o app: init_db tenta de novo a cada início
+    converter_builds_ids_itens(cursor)
+
+# Tabelas de fatos que guardam o nome do personagem e ganham a coluna personagem_id
+TABELAS_COM_PERSONAGEM = {
+    'hunts_solo': 'id',
+    'mortes': 'id',
+    'builds': 'id',
+    'hunt_grupo_participantes': 'hunt_id',
+}
+
+def _migracao_personagens(cursor):
+    # Cadastro de personagens: a ordem define a exibição nos formulários
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS personagens (
+        id INTEGER PRIMARY KEY,
+        nome TEXT NOT NULL UNIQUE,
+        ordem INTEGER NOT NULL DEFAULT 0,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+    ''')
+    # Começa com quem já aparece nos registros; só o banco padrão (a guilda original)
+    # recebe também a lista que ficava no código, guildas novas começam sem personagens
+    nomes = list(PERSONAGENS_INICIAIS) if guilda_atual() is None else []
+    for tabela in TABELAS_COM_PERSONAGEM:
+        for (nome,) in cursor.execute(f"SELECT DISTINCT personagem FROM {tabela} ORDER BY personagem"):
+            if nome not in nomes:
+                nomes.append(nome)
+    cursor.executemany(
+        "INSERT OR IGNORE INTO personagens (nome, ordem) VALUES (?, ?)",
+        ((nome, ordem) for ordem, nome in enumerate(nomes))
+    )
+
+    for tabela, chave in TABELAS_COM_PERSONAGEM.items():
+        cursor.execute(f"ALTER TABLE {tabela} ADD COLUMN personagem_id INTEGER REFERENCES personagens (id)")
+        cursor.execute(f"UPDATE {tabela} SET personagem_id = (SELECT id FROM personagens WHERE nome = {tabela}.personagem)")
+        # Quem grava só o nome (importação, formulários antigos) recebe o id por trigger;
+        # um nome novo é cadastrado no fim da lista
+        condicao = "hunt_id = NEW.hunt_id AND personagem = NEW.personagem" if chave == 'hunt_id' else "id = NEW.id"
+        cursor.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS trg_{tabela}_personagem_id
+        AFTER INSERT ON {tabela}
+        WHEN NEW.personagem_id IS NULL
+        BEGIN
+            INSERT OR IGNORE INTO personagens (nome, ordem)
+            VALUES (NEW.personagem, (SELECT COALESCE(MAX(ordem), -1) + 1 FROM personagens));
+            UPDATE {tabela} SET personagem_id = (SELECT id FROM personagens WHERE nome = NEW.personagem)
+            WHERE {condicao};
+        END
+        ''')
+    cursor.execute('''
+    CREATE TRIGGER IF NOT EXISTS trg_builds_personagem_id_alterar
+    AFTER UPDATE OF personagem ON builds
+    BEGIN
+        INSERT OR IGNORE INTO personagens (nome, ordem)
+        VALUES (NEW.personagem, (SELECT COALESCE(MAX(ordem), -1) + 1 FROM personagens));
+        UPDATE builds SET personagem_id = (SELECT id FROM personagens WHERE nome = NEW.personagem) WHERE id = NEW.id;
+    END
+    ''')
+
+def _migracao_lancamentos(cursor):
+    # Livro-razão de prata: um lançamento com sinal por registro e personagem.
+    # origem é 'solo', 'grupo' ou 'morte' e origem_id o id da hunt ou da morte;
+    # nas hunts em grupo cada participante recebe sua cota (valor_total / num_participantes)
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS lancamentos (
+        id INTEGER PRIMARY KEY,
+        data DATE NOT NULL,
+        personagem TEXT NOT NULL,
+        origem TEXT NOT NULL,
+        origem_id INTEGER NOT NULL,
+        valor REAL NOT NULL,
+        UNIQUE (origem, origem_id, personagem)
+    )
+    ''')
+    # Saldo por personagem: as janelas (PARTITION BY personagem ORDER BY data, id) seguem o índice,
+    # e com valor no índice os totais não leem a tabela
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_lancamentos_personagem_data ON lancamentos (personagem, data, id, valor)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_lancamentos_data ON lancamentos (data)')
+
+    # Triggers que mantêm os lançamentos a cada insert/delete nas tabelas de fatos
+    cursor.execute('''
+    CREATE TRIGGER IF NOT EXISTS trg_hunts_solo_lancamentos_inserir
+    AFTER INSERT ON hunts_solo
+    BEGIN
+        INSERT INTO lancamentos (data, personagem, origem, origem_id, valor)
+        VALUES (NEW.data, NEW.personagem, 'solo', NEW.id, NEW.lucro_itens);
+    END
+    ''')
+    cursor.execute('''
+    CREATE TRIGGER IF NOT EXISTS trg_hunts_solo_lancamentos_apagar
+    AFTER DELETE ON hunts_solo
+    BEGIN
+        DELETE FROM lancamentos WHERE origem = 'solo' AND origem_id = OLD.id;
+    END
+    ''')
+    cursor.execute('''
+    CREATE TRIGGER IF NOT EXISTS trg_mortes_lancamentos_inserir
+    AFTER INSERT ON mortes
+    BEGIN
+        INSERT INTO lancamentos (data, personagem, origem, origem_id, valor)
+        VALUES (NEW.data, NEW.personagem, 'morte', NEW.id, -NEW.valor_perdido);
+    END
+    ''')
+    cursor.execute('''
+    CREATE TRIGGER IF NOT EXISTS trg_mortes_lancamentos_apagar
+    AFTER DELETE ON mortes
+    BEGIN
+        DELETE FROM lancamentos WHERE origem = 'morte' AND origem_id = OLD.id;
+    END
+    ''')
+    # Como em estatisticas_diarias, os triggers das hunts em grupo ficam nos participantes
+    cursor.execute('''
+    CREATE TRIGGER IF NOT EXISTS trg_participantes_lancamentos_inserir
+    AFTER INSERT ON hunt_grupo_participantes
+    BEGIN
+        INSERT INTO lancamentos (data, personagem, origem, origem_id, valor)
+        SELECT data, NEW.personagem, 'grupo', NEW.hunt_id, valor_total * 1.0 / num_participantes
+        FROM hunts_grupo WHERE id = NEW.hunt_id;
+    END
+    ''')
+    cursor.execute('''
+    CREATE TRIGGER IF NOT EXISTS trg_participantes_lancamentos_apagar
+    AFTER DELETE ON hunt_grupo_participantes
+    BEGIN
+        DELETE FROM lancamentos WHERE origem = 'grupo' AND origem_id = OLD.hunt_id AND personagem = OLD.personagem;
+    END
+    ''')
+
+    # Preencher com o que já existe, em ordem de data para os ids seguirem a cronologia
+    cursor.execute('''
+    INSERT OR IGNORE INTO lancamentos (data, personagem, origem, origem_id, valor)
+    SELECT data, personagem, origem, origem_id, valor FROM (
+        SELECT data, personagem, 'solo' AS origem, id AS origem_id, lucro_itens AS valor FROM hunts_solo
+        UNION ALL
+        SELECT data, personagem, 'morte', id, -valor_perdido FROM mortes
+        UNION ALL
+        SELECT h.data, p.personagem, 'grupo', h.id, h.valor_total * 1.0 / h.num_participantes
+        FROM hunts_grupo h JOIN hunt_grupo_participantes p ON p.hunt_id = h.id
+    )
+    ORDER BY data
+    ''')
+
+def _migracao_exclusoes(cursor):
+    # Registro das exclusões nas tabelas de histórico, para a cópia em memória (dataset.py)
+    # descartar só os ids apagados em vez de reler a tabela
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS exclusoes (
+        seq INTEGER PRIMARY KEY,
+        tabela TEXT NOT NULL,
+        registro_id INTEGER NOT NULL
+    )
+    ''')
+    for tabela in ('hunts_solo', 'hunts_grupo', 'mortes'):
+        cursor.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS trg_{tabela}_exclusoes
+        AFTER DELETE ON {tabela}
+        BEGIN
+            INSERT INTO exclusoes (tabela, registro_id) VALUES ('{tabela}', OLD.id);
+        END
+        ''')
+
+MIGRACOES = [
+    _migracao_coluna_secundaria,
+    _migracao_indices,
+    _migracao_participantes_grupo,
+    _migracao_estatisticas_diarias,
+    _migracao_importacoes,
+    _migracao_builds_atualizado_em,
+    _migracao_builds_ids_itens,
+    _migracao_personagens,
+    _migracao_lancamentos,
+    _migracao_exclusoes,
+]
+
+def migrar_db(conn):
+    """Aplica as migrações pendentes, cada uma em sua própria transação"""
+    for versao, migracao in enumerate(MIGRACOES, start=1):
+        if conn.execute('PRAGMA user_version').fetchone()[0] >= versao:
+            continue
+        # BEGIN IMMEDIATE trava o banco para escrita; outro processo que chegue junto
+        # espera e, ao reler user_version, pula a migração já aplicada
+        conn.execute('BEGIN IMMEDIATE')
         try:
-            cursor.execute('ALTER TABLE builds ADD COLUMN secundaria TEXT')
+            if conn.execute('PRAGMA user_version').fetchone()[0] >= versao:
+                conn.rollback()
+                continue
+            migracao(conn.cursor())
+            conn.execute(f'PRAGMA user_version = {versao}')
             conn.commit()
-        except sqlite3.OperationalError:
-            # Coluna já existe
-            pass 
\ No newline at end of file
+        except Exception:
+            conn.rollback()
+            raise
+
+# Bancos cujo schema já foi inicializado neste processo
+_bancos_inicializados = set()
+_bancos_lock = threading.Lock()
+
+def garantir_db():
+    """
+    Inicializa o schema uma única vez por processo e arquivo de banco.
+    O Streamlit reexecuta as páginas a cada interação; depois da primeira
+    chamada isto é só uma consulta a um set em memória.
+    """
+    caminho = banco_atual()
+    if caminho in _bancos_inicializados:
+        return
+    with _bancos_lock:
+        if caminho not in _bancos_inicializados:
+            init_db()
+            _bancos_inicializados.add(caminho)
+
+
+# Consultas de histórico com filtros e paginação feitos no próprio SQL
+
+# Colunas retornadas por tabela de histórico
+COLUNAS_HISTORICO = {
+    'hunts_solo': ['id', 'data', 'personagem', 'tipo_hunt', 'lucro_itens', 'descricao'],
+    'hunts_grupo': ['id', 'data', 'personagens', 'valor_total', 'observacoes', 'num_participantes'],
+    'mortes': ['id', 'data', 'personagem', 'valor_perdido', 'descricao'],
+}
+
+def formatar_data(valor):
+    # Aceita date/datetime ou string já no formato do banco (YYYY-MM-DD)
+    if hasattr(valor, 'strftime'):
+        return valor.strftime('%Y-%m-%d')
+    return valor
+
+# Tipos compactos dos DataFrames devolvidos pelas consultas
+COLUNAS_CATEGORICAS = ('personagem', 'tipo_hunt', 'origem')
+# Valores em prata, que no jogo são sempre inteiros
+COLUNAS_PRATA = ('lucro_itens', 'valor_total', 'valor_perdido', 'lucro', 'valor', 'saldo', 'ganhos', 'perdas')
+
+def compactar_tipos(df):
+    """
+    Converte um DataFrame recém-lido do banco para tipos compactos:
+    data em datetime64 (formatada só na exibição), personagem e tipo_hunt categóricos
+    e valores em prata como inteiros.
+    """
+    if 'data' in df:
+        df['data'] = pd.to_datetime(df['data'], format='ISO8601')
+    for coluna in COLUNAS_CATEGORICAS:
+        if coluna in df:
+            df[coluna] = df[coluna].astype('category')
+    for coluna in COLUNAS_PRATA:
+        if coluna in df:
+            df[coluna] = df[coluna].round().astype('int64')
+    return df
+
+def montar_filtros(tabela, personagem=None, tipo_hunt=None, data_inicio=None, data_fim=None, tamanho_grupo=None):
+    """
+    Monta a cláusula WHERE parametrizada para os filtros da sidebar.
+    Retorna (sql, parametros); sql é vazio quando não há filtros.
+    """
+    if tabela not in COLUNAS_HISTORICO:
+        raise ValueError(f"Tabela desconhecida: {tabela}")
+
+    condicoes = []
+    parametros = []
+    if personagem and tabela != 'hunts_grupo':
+        condicoes.append("personagem = ?")
+        parametros.append(personagem)
+    if tipo_hunt and tabela == 'hunts_solo':
+        condicoes.append("tipo_hunt = ?")
+        parametros.append(tipo_hunt)
+    if data_inicio:
+        condicoes.append("data >= ?")
+        parametros.append(formatar_data(data_inicio))
+    if data_fim:
+        condicoes.append("data <= ?")
+        parametros.append(formatar_data(data_fim))
+    if tamanho_grupo and tabela == 'hunts_grupo':
+        condicoes.append("num_participantes BETWEEN ? AND ?")
+        parametros.extend(tamanho_grupo)
+
+    if not condicoes:
+        return "", parametros
+    return " WHERE " + " AND ".join(condicoes), parametros
+
+def montar_filtros_estatisticas(categoria, personagem=None, tipo_hunt=None, data_inicio=None, data_fim=None, tamanho_grupo=None):
+    """Equivalente a montar_filtros para a tabela de agregados estatisticas_diarias"""
+    condicoes = ["categoria = ?"]
+    parametros = [categoria]
+    if personagem:
+        condicoes.append("personagem = ?")
+        parametros.append(personagem)
+    if tipo_hunt and categoria == 'solo':
+        condicoes.append("detalhe = ?")
+        parametros.append(tipo_hunt)
+    if data_inicio:
+        condicoes.append("data >= ?")
+        parametros.append(formatar_data(data_inicio))
+    if data_fim:
+        condicoes.append("data <= ?")
+        parametros.append(formatar_data(data_fim))
+    if tamanho_grupo and categoria == 'grupo':
+        condicoes.append("CAST(detalhe AS INTEGER) BETWEEN ? AND ?")
+        parametros.extend(tamanho_grupo)
+    return " WHERE " + " AND ".join(condicoes), parametros
+
+def ler_historico(tabela, limite=None, deslocamento=0, **filtros):
+    """
+    Lê do banco uma página do histórico já filtrada, da data mais recente para a mais antiga.
+    filtros: personagem, tipo_hunt, data_inicio, data_fim, tamanho_grupo
+    """
+    where, parametros = montar_filtros(tabela, **filtros)
+    colunas = ", ".join(COLUNAS_HISTORICO[tabela])
+    query = f"SELECT {colunas} FROM {tabela}{where} ORDER BY data DESC, id DESC"
+    if limite is not None:
+        query += " LIMIT ? OFFSET ?"
+        parametros = parametros + [limite, deslocamento]
+    with get_db_connection(somente_leitura=True) as conn:
+        return compactar_tipos(pd.read_sql_query(query, conn, params=parametros))
+
+def ler_historico_apos(tabela, ultimo_id):
+    """Registros com id maior que ultimo_id (inseridos depois de uma leitura anterior), já com tipos compactos"""
+    if tabela not in COLUNAS_HISTORICO:
+        raise ValueError(f"Tabela desconhecida: {tabela}")
+    colunas = ", ".join(COLUNAS_HISTORICO[tabela])
+    # Sem ORDER BY no SQL a busca segue o rowid; as poucas linhas são ordenadas no pandas
+    with get_db_connection(somente_leitura=True) as conn:
+        df = compactar_tipos(pd.read_sql_query(
+            f"SELECT {colunas} FROM {tabela} WHERE id > ?", conn, params=[ultimo_id]
+        ))
+    return df.sort_values(['data', 'id'], ascending=False, ignore_index=True)
+
+def situacao_historico(tabela):
+    """Retorna (maior id da tabela, última exclusão registrada), para detectar inserções e exclusões"""
+    if tabela not in COLUNAS_HISTORICO:
+        raise ValueError(f"Tabela desconhecida: {tabela}")
+    with get_db_connection(somente_leitura=True) as conn:
+        return conn.execute(f"""
+            SELECT (SELECT COALESCE(MAX(id), 0) FROM {tabela}),
+                   (SELECT COALESCE(MAX(seq), 0) FROM exclusoes)
+        """).fetchone()
+
+def ler_exclusoes(tabela, apos_seq):
+    """Ids apagados da tabela depois da exclusão apos_seq"""
+    with get_db_connection(somente_leitura=True) as conn:
+        return [registro_id for (registro_id,) in conn.execute(
+            "SELECT registro_id FROM exclusoes WHERE seq > ? AND tabela = ?", (apos_seq, tabela)
+        )]
+
+# Os resumos abaixo leem de estatisticas_diarias: o custo depende de dias x personagens,
+# não do número de registros brutos
+
+@cache_consulta('hunts_solo')
+def resumir_hunts_solo(**filtros):
+    """Lucro total e quantidade de hunts por personagem e tipo de hunt"""
+    where, parametros = montar_filtros_estatisticas('solo', **filtros)
+    query = f"""
+        SELECT personagem, detalhe AS tipo_hunt, SUM(valor) AS lucro_itens, SUM(quantidade) AS quantidade
+        FROM estatisticas_diarias{where}
+        GROUP BY personagem, detalhe
+    """
+    with get_db_connection(somente_leitura=True) as conn:
+        return compactar_tipos(pd.read_sql_query(query, conn, params=parametros))
+
+@cache_consulta('hunts_grupo')
+def resumir_hunts_grupo(**filtros):
+    """Totais das hunts em grupo filtradas: quantidade, média de participantes, valor total e média por pessoa"""
+    where, parametros = montar_filtros_estatisticas('grupo', **filtros)
+    # Cada hunt de n participantes aparece n vezes nos agregados (uma por participante),
+    # por isso quantidade / n conta hunts e valor / n soma a cota de cada hunt uma vez
+    query = f"""
+        SELECT ROUND(SUM(quantidade * 1.0 / n)), SUM(quantidade), SUM(valor), SUM(valor / n)
+        FROM (
+            SELECT quantidade, valor, CAST(detalhe AS INTEGER) AS n
+            FROM estatisticas_diarias{where}
+        )
+    """
+    with get_db_connection(somente_leitura=True) as conn:
+        cursor = conn.cursor()
+        cursor.execute(query, parametros)
+        quantidade, participacoes, valor_total, soma_cotas = cursor.fetchone()
+    quantidade = int(quantidade or 0)
+    return {
+        'quantidade': quantidade,
+        'media_participantes': participacoes / quantidade if quantidade else 0,
+        'valor_total': round(valor_total or 0),
+        'media_por_pessoa': soma_cotas / quantidade if quantidade else 0,
+    }
+
+@cache_consulta('hunts_grupo')
+def medias_hunts_grupo_por_personagem(personagens, **filtros):
+    """Média por pessoa e número de participações de cada personagem nas hunts em grupo filtradas"""
+    if not personagens:
+        return pd.DataFrame(columns=['personagem', 'media', 'participacoes'])
+    where, parametros = montar_filtros_estatisticas('grupo', **filtros)
+    marcadores = ", ".join("?" for _ in personagens)
+    query = f"""
+        SELECT personagem, SUM(valor) / SUM(quantidade) AS media, SUM(quantidade) AS participacoes
+        FROM estatisticas_diarias{where} AND personagem IN ({marcadores})
+        GROUP BY personagem
+    """
+    with get_db_connection(somente_leitura=True) as conn:
+        df = compactar_tipos(pd.read_sql_query(query, conn, params=parametros + list(personagens)))
+    # Mantém a ordem da lista de personagens
+    ordem = {nome: i for i, nome in enumerate(personagens)}
+    return df.sort_values('personagem', key=lambda coluna: coluna.astype(object).map(ordem)).reset_index(drop=True)
+
+def inserir_hunt_solo(cursor, data, personagem, tipo_hunt, lucro_itens, descricao):
+    """Insere uma hunt solo na transação do cursor informado e retorna o id criado"""
+    cursor.execute("""
+        INSERT INTO hunts_solo (data, personagem, tipo_hunt, lucro_itens, descricao, personagem_id)
+        VALUES (?, ?, ?, ?, ?, (SELECT id FROM personagens WHERE nome = ?))
+    """, (formatar_data(data), personagem, tipo_hunt, lucro_itens, descricao, personagem))
+    return cursor.lastrowid
+
+def inserir_morte(cursor, data, personagem, valor_perdido, descricao):
+    """Insere uma morte na transação do cursor informado e retorna o id criado"""
+    cursor.execute("""
+        INSERT INTO mortes (data, personagem, valor_perdido, descricao, personagem_id)
+        VALUES (?, ?, ?, ?, (SELECT id FROM personagens WHERE nome = ?))
+    """, (formatar_data(data), personagem, valor_perdido, descricao, personagem))
+    return cursor.lastrowid
+
+def inserir_hunt_grupo(cursor, data, personagens, valor_total, observacoes):
+    """
+    Insere uma hunt em grupo e seus participantes na transação do cursor informado.
+    Retorna o id da hunt criada.
+    """
+    nomes = separar_personagens(personagens)
+    cursor.execute("""
+        INSERT INTO hunts_grupo (data, personagens, valor_total, observacoes, num_participantes)
+        VALUES (?, ?, ?, ?, ?)
+    """, (formatar_data(data), ", ".join(nomes), valor_total, observacoes, max(1, len(nomes))))
+    hunt_id = cursor.lastrowid
+    cursor.executemany("""
+        INSERT INTO hunt_grupo_participantes (hunt_id, personagem, personagem_id)
+        VALUES (?, ?, (SELECT id FROM personagens WHERE nome = ?))
+    """, ((hunt_id, nome, nome) for nome in nomes))
+    return hunt_id
+
+# Valor de uma linha de estatisticas_diarias no saldo: mortes entram negativas
+VALOR_LIQUIDO = "CASE WHEN categoria = 'morte' THEN -valor ELSE valor END"
+
+@cache_consulta('hunts_solo', 'hunts_grupo', 'mortes')
+def lucro_diario(personagem=None, data_inicio=None, data_fim=None):
+    """
+    Lucro líquido por dia e personagem: hunts solo + cotas das hunts em grupo - valor perdido em mortes.
+    Uma linha por (dia, personagem) com atividade, em ordem de dia.
+    O GROUP BY segue a chave primária dos agregados, então não há ordenação extra.
+    """
+    condicoes = []
+    parametros = []
+    if personagem:
+        condicoes.append("personagem = ?")
+        parametros.append(personagem)
+    if data_inicio:
+        condicoes.append("data >= ?")
+        parametros.append(formatar_data(data_inicio))
+    if data_fim:
+        condicoes.append("data <= ?")
+        parametros.append(formatar_data(data_fim))
+    where = " WHERE " + " AND ".join(condicoes) if condicoes else ""
+    query = f"""
+        SELECT data, personagem,
+               SUM({VALOR_LIQUIDO}) AS lucro
+        FROM estatisticas_diarias{where}
+        GROUP BY data, personagem
+    """
+    with get_db_connection(somente_leitura=True) as conn:
+        return compactar_tipos(pd.read_sql_query(query, conn, params=parametros))
+
+# Saldo líquido: os lançamentos (lancamentos) só para as linhas do extrato;
+# totais e saldos diários saem de estatisticas_diarias, com tamanho dias x personagens
+
+def montar_filtros_lancamentos(personagem=None, data_fim=None):
+    # Só filtros que não mudam o saldo acumulado: data_inicio é aplicada depois da janela.
+    # Servem tanto para lancamentos quanto para estatisticas_diarias
+    condicoes = []
+    parametros = []
+    if personagem:
+        condicoes.append("personagem = ?")
+        parametros.append(personagem)
+    if data_fim:
+        condicoes.append("data <= ?")
+        parametros.append(formatar_data(data_fim))
+    where = " WHERE " + " AND ".join(condicoes) if condicoes else ""
+    return where, parametros
+
+@cache_consulta('hunts_solo', 'hunts_grupo', 'mortes')
+def ler_extrato(personagem=None, data_inicio=None, data_fim=None, limite=None, deslocamento=0):
+    """
+    Lançamentos do mais recente para o mais antigo, com o saldo do personagem após cada um.
+    O saldo soma todo o histórico do personagem, mesmo antes de data_inicio.
+    Em vez de acumular desde o primeiro lançamento, o saldo é o total do personagem menos
+    os lançamentos mais novos (janela decrescente): só as linhas até o fim da página são lidas
+    do livro-razão, e o total sai dos agregados diários.
+    """
+    where, parametros = montar_filtros_lancamentos(personagem, data_fim)
+    where_recentes, parametros_recentes = where, list(parametros)
+    if data_inicio:
+        where_recentes += (" AND" if where else " WHERE") + " data >= ?"
+        parametros_recentes.append(formatar_data(data_inicio))
+    # LIMIT -1 no SQLite é sem limite
+    fim_pagina = -1 if limite is None else deslocamento + limite
+    query = f"""
+        WITH recentes AS (
+            SELECT id, data, personagem, origem, origem_id, valor
+            FROM lancamentos{where_recentes}
+            ORDER BY data DESC, id DESC
+            LIMIT ?
+        ),
+        totais AS (
+            SELECT personagem, SUM({VALOR_LIQUIDO}) AS total
+            FROM estatisticas_diarias{where}{" AND" if where else " WHERE"} personagem IN (SELECT personagem FROM recentes)
+            GROUP BY personagem
+        )
+        SELECT r.data, r.personagem, r.origem, r.origem_id, r.valor,
+               t.total - COALESCE(SUM(r.valor) OVER (
+                   PARTITION BY r.personagem ORDER BY r.data DESC, r.id DESC
+                   ROWS BETWEEN UNBOUNDED PRECEDING AND 1 PRECEDING
+               ), 0) AS saldo
+        FROM recentes r JOIN totais t ON t.personagem = r.personagem
+        ORDER BY r.data DESC, r.id DESC
+        LIMIT -1 OFFSET ?
+    """
+    parametros = parametros_recentes + [fim_pagina] + parametros + [deslocamento]
+    with get_db_connection(somente_leitura=True) as conn:
+        return compactar_tipos(pd.read_sql_query(query, conn, params=parametros))
+
+@cache_consulta('hunts_solo', 'hunts_grupo', 'mortes')
+def contar_lancamentos(personagem=None, data_inicio=None, data_fim=None):
+    """Retorna quantos lançamentos atendem aos filtros (um por hunt solo, participante de hunt em grupo ou morte)"""
+    where, parametros = montar_filtros_lancamentos(personagem, data_fim)
+    if data_inicio:
+        where += (" AND" if where else " WHERE") + " data >= ?"
+        parametros.append(formatar_data(data_inicio))
+    # estatisticas_diarias conta exatamente os mesmos registros que geram lançamentos
+    with get_db_connection(somente_leitura=True) as conn:
+        return conn.execute(f"SELECT COALESCE(SUM(quantidade), 0) FROM estatisticas_diarias{where}", parametros).fetchone()[0]
+
+@cache_consulta('hunts_solo', 'hunts_grupo', 'mortes')
+def saldo_diario(personagem=None, data_inicio=None, data_fim=None):
+    """
+    Saldo de cada personagem no fim de cada dia com lançamentos.
+    Acumula os agregados diários, então o custo depende de dias x personagens.
+    """
+    where, parametros = montar_filtros_lancamentos(personagem, data_fim)
+    query = f"""
+        WITH saldos AS (
+            SELECT data, personagem,
+                   SUM(SUM({VALOR_LIQUIDO})) OVER (PARTITION BY personagem ORDER BY data) AS saldo
+            FROM estatisticas_diarias{where}
+            GROUP BY personagem, data
+        )
+        SELECT data, personagem, saldo FROM saldos
+    """
+    if data_inicio:
+        query += " WHERE data >= ?"
+        parametros.append(formatar_data(data_inicio))
+    query += " ORDER BY data, personagem"
+    with get_db_connection(somente_leitura=True) as conn:
+        return compactar_tipos(pd.read_sql_query(query, conn, params=parametros))
+
+@cache_consulta('hunts_solo', 'hunts_grupo', 'mortes')
+def saldo_por_personagem(data_fim=None):
+    """Saldo total, ganhos (hunts) e perdas (mortes) de cada personagem, a partir dos agregados diários"""
+    where, parametros = montar_filtros_lancamentos(data_fim=data_fim)
+    query = f"""
+        SELECT personagem,
+               SUM({VALOR_LIQUIDO}) AS saldo,
+               SUM(CASE WHEN categoria = 'morte' THEN 0 ELSE valor END) AS ganhos,
+               SUM(CASE WHEN categoria = 'morte' THEN valor ELSE 0 END) AS perdas
+        FROM estatisticas_diarias{where}
+        GROUP BY personagem
+        ORDER BY saldo DESC
+    """
+    with get_db_connection(somente_leitura=True) as conn:
+        return compactar_tipos(pd.read_sql_query(query, conn, params=parametros))
+
+# Cadastro de personagens
+
+# Nomes na ordem de exibição, nome -> id e nome -> posição em nomes; imutáveis e compartilhados entre sessões
+Personagens = namedtuple('Personagens', ['nomes', 'ids', 'posicoes'])
+
+@cache_consulta('personagens')
+def obter_personagens():
+    """Retorna os personagens cadastrados na ordem de exibição"""
+    with get_db_connection(somente_leitura=True) as conn:
+        linhas = conn.execute("SELECT id, nome FROM personagens ORDER BY ordem, id").fetchall()
+    return Personagens(
+        nomes=tuple(nome for _, nome in linhas),
+        ids=MappingProxyType({nome: personagem_id for personagem_id, nome in linhas}),
+        posicoes=MappingProxyType({nome: posicao for posicao, (_, nome) in enumerate(linhas)}),
+    )
+
+def cadastrar_personagens(cursor, nomes):
+    """
+    Cadastra no fim da lista os nomes que ainda não existem, na transação do cursor informado.
+    Chamado antes de inserts em lote, para o personagem_id sair da subconsulta e não do trigger.
+    Retorna quantos nomes foram criados.
+    """
+    antes = cursor.connection.total_changes
+    cursor.executemany("""
+        INSERT OR IGNORE INTO personagens (nome, ordem)
+        VALUES (?, (SELECT COALESCE(MAX(ordem), -1) + 1 FROM personagens))
+    """, ((nome,) for nome in dict.fromkeys(nomes)))
+    return cursor.connection.total_changes - antes
+
+def adicionar_personagem(nome):
+    """Cadastra um personagem no fim da lista; retorna False se o nome já existia"""
+    nome = nome.strip()
+    if not nome:
+        raise ValueError("Nome do personagem vazio")
+    with get_db_connection() as conn:
+        criado = cadastrar_personagens(conn.cursor(), [nome]) > 0
+        conn.commit()
+    if criado:
+        invalidar('personagens')
+    return criado
+
+@cache_consulta('mortes')
+def resumir_mortes(**filtros):
+    """Quantidade de mortes e valor perdido por personagem"""
+    where, parametros = montar_filtros_estatisticas('morte', **filtros)
+    query = f"""
+        SELECT personagem, SUM(quantidade) AS mortes, SUM(valor) AS valor_perdido
+        FROM estatisticas_diarias{where}
+        GROUP BY personagem
+    """
+    with get_db_connection(somente_leitura=True) as conn:
+        return compactar_tipos(pd.read_sql_query(query, conn, params=parametros))
+
+@cache_consulta('builds', 'personagens')
+def listar_builds(tipo=None, personagem=None):
+    """Retorna as builds ordenadas por tipo e nome, opcionalmente filtradas"""
+    condicoes = []
+    parametros = []
+    if tipo:
+        condicoes.append("tipo = ?")
+        parametros.append(tipo)
+    if personagem:
+        # Filtra pelo id do cadastro (inteiro) em vez do nome
+        condicoes.append("personagem_id = ?")
+        parametros.append(obter_personagens().ids.get(personagem))
+    where = " WHERE " + " AND ".join(condicoes) if condicoes else ""
+    with get_db_connection(somente_leitura=True) as conn:
+        return pd.read_sql_query(f"SELECT * FROM builds{where} ORDER BY tipo, nome", conn, params=parametros)
+
+# Resumo do dashboard (main.py) em uma única ida ao banco
+
+TIPOS_ATIVIDADE = ['Solo', 'Grupo', 'Morte']
+
+@cache_consulta('hunts_solo', 'hunts_grupo', 'mortes')
+def get_dashboard_summary(days=30, hoje=None):
+    """
+    Retorna os totais de cada tipo e a atividade diária dos últimos `days` dias até `hoje`
+    (por padrão a data atual; os benchmarks passam o último dia dos dados gerados).
+    Tudo sai de um único SELECT com UNION ALL sobre estatisticas_diarias em uma única conexão:
+    a linha com dia NULL traz os totais e as demais a contagem de cada dia.
+    O DataFrame 'atividade' já vem indexado por data com uma coluna por tipo.
+    """
+    # Hunts em grupo aparecem uma vez por participante; quantidade / n conta cada hunt uma vez
+    contagens = """
+        CAST(COALESCE(SUM(CASE WHEN categoria = 'solo' THEN quantidade END), 0) AS INTEGER),
+        CAST(ROUND(COALESCE(SUM(CASE WHEN categoria = 'grupo' THEN quantidade * 1.0 / CAST(detalhe AS INTEGER) END), 0)) AS INTEGER),
+        CAST(COALESCE(SUM(CASE WHEN categoria = 'morte' THEN quantidade END), 0) AS INTEGER)
+    """
+    query = f"""
+        SELECT NULL AS dia, {contagens} FROM estatisticas_diarias
+        UNION ALL
+        SELECT date(data) AS dia, {contagens}
+        FROM estatisticas_diarias
+        WHERE data >= date(COALESCE(?, 'now'), ?)
+        GROUP BY dia
+        ORDER BY dia
+    """
+    with get_db_connection(somente_leitura=True) as conn:
+        linhas = conn.execute(query, (hoje and formatar_data(hoje), f"-{int(days)} days")).fetchall()
+
+    # ORDER BY coloca a linha de totais (dia NULL) primeiro
+    _, total_solo, total_grupo, total_mortes = linhas[0]
+    atividade = pd.DataFrame(
+        [linha[1:] for linha in linhas[1:]],
+        index=pd.to_datetime([linha[0] for linha in linhas[1:]]),
+        columns=TIPOS_ATIVIDADE,
+    )
+    atividade.index.name = 'data'
+    return {
+        'total_hunts_solo': total_solo,
+        'total_hunts_grupo': total_grupo,
+        'total_mortes': total_mortes,
+        'atividade': atividade,
+    }
@@ -0,0 +1,132 @@
+# Histórico completo de cada tabela em memória, compartilhado por todas as sessões do processo
+
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+from cache import TTL_PADRAO, geracao
+from database import (COLUNAS_HISTORICO, banco_atual, ler_exclusoes, ler_historico, ler_historico_apos,
+                      situacao_historico)
+
+def _anexar(df, novos):
+    # Junta os registros novos mantendo a ordem (data, id) decrescente e as colunas categóricas
+    if novos.empty:
+        return df
+    for coluna in df.columns:
+        if isinstance(df[coluna].dtype, pd.CategoricalDtype):
+            categorias = df[coluna].cat.categories.union(novos[coluna].cat.categories)
+            df = df.assign(**{coluna: df[coluna].cat.set_categories(categorias)})
+            novos = novos.assign(**{coluna: novos[coluna].cat.set_categories(categorias)})
+    # O caso comum (registros de hoje) vai para o topo
+    if df.empty or novos['data'].min() >= df['data'].max():
+        return pd.concat([novos, df], ignore_index=True)
+    # Datas retroativas: cada registro novo entra antes do primeiro de data menor ou igual
+    # (os ids novos são maiores, então vêm primeiro no mesmo dia), sem reordenar tudo
+    datas_crescentes = df['data'].to_numpy()[::-1]
+    posicoes = len(df) - np.searchsorted(datas_crescentes, novos['data'].to_numpy(), side='right')
+    ordem = np.insert(np.arange(len(df)), posicoes, len(df) + np.arange(len(novos)))
+    return pd.concat([df, novos], ignore_index=True).take(ordem).reset_index(drop=True)
+
+class DatasetHistorico:
+    """
+    Uma única cópia de cada tabela de histórico por processo e banco (guilda), já com tipos compactos
+    e ordenada da data mais recente para a mais antiga.
+    A tabela é lida inteira só na primeira vez; depois de uma escrita (cache.invalidar) ou quando
+    o TTL vence, só os registros com id maior que o último carregado são lidos e os ids
+    registrados na tabela exclusoes são descartados. As páginas devolvidas são fatias do
+    DataFrame compartilhado (sem cópia dos dados) e não devem ser alteradas.
+    """
+
+    def __init__(self, ttl=TTL_PADRAO):
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        # (banco, tabela) -> (geração, expira_em, DataFrame, maior id carregado, última exclusão aplicada)
+        self._tabelas = {}
+
+    def _carregar(self, tabela):
+        # A situação é lida antes: uma exclusão durante a leitura é reaplicada sem efeito
+        _, ultima_exclusao = situacao_historico(tabela)
+        df = ler_historico(tabela)
+        ultimo_id = int(df['id'].max()) if len(df) else 0
+        return df, ultimo_id, ultima_exclusao
+
+    def _atualizar(self, tabela, df, ultimo_id, ultima_exclusao):
+        maior_id, exclusao = situacao_historico(tabela)
+        if exclusao > ultima_exclusao:
+            apagados = ler_exclusoes(tabela, ultima_exclusao)
+            if apagados:
+                df = df[~df['id'].isin(apagados)].reset_index(drop=True)
+        if maior_id > ultimo_id:
+            novos = ler_historico_apos(tabela, ultimo_id)
+            df = _anexar(df, novos)
+            if len(novos):
+                ultimo_id = int(novos['id'].max())
+        return df, ultimo_id, exclusao
+
+    def obter(self, tabela):
+        """Retorna o DataFrame completo da tabela, atualizando se houve escrita ou o TTL venceu"""
+        if tabela not in COLUNAS_HISTORICO:
+            raise ValueError(f"Tabela desconhecida: {tabela}")
+        chave = (banco_atual(), tabela)
+        entrada = self._tabelas.get(chave)
+        if entrada is not None and entrada[0] == geracao(tabela) and entrada[1] > time.monotonic():
+            return entrada[2]
+        with self._lock:
+            # Outra sessão pode ter atualizado enquanto esta esperava o lock
+            entrada = self._tabelas.get(chave)
+            g = geracao(tabela)
+            if entrada is None:
+                df, ultimo_id, ultima_exclusao = self._carregar(tabela)
+            elif entrada[0] != g or entrada[1] <= time.monotonic():
+                df, ultimo_id, ultima_exclusao = self._atualizar(tabela, *entrada[2:])
+            else:
+                return entrada[2]
+            # Uma escrita durante a leitura deixa a entrada já vencida para a próxima chamada
+            self._tabelas[chave] = (g, time.monotonic() + self.ttl, df, ultimo_id, ultima_exclusao)
+        return df
+
+    def _filtrar(self, tabela, personagem=None, tipo_hunt=None, data_inicio=None, data_fim=None, tamanho_grupo=None):
+        # Mesmas regras de database.montar_filtros, aplicadas em memória
+        df = self.obter(tabela)
+        mascara = None
+
+        def combinar(condicao):
+            nonlocal mascara
+            mascara = condicao if mascara is None else mascara & condicao
+
+        if personagem and tabela != 'hunts_grupo':
+            combinar(df['personagem'] == personagem)
+        if tipo_hunt and tabela == 'hunts_solo':
+            combinar(df['tipo_hunt'] == tipo_hunt)
+        if data_inicio:
+            combinar(df['data'] >= pd.Timestamp(data_inicio))
+        if data_fim:
+            combinar(df['data'] <= pd.Timestamp(data_fim))
+        if tamanho_grupo and tabela == 'hunts_grupo':
+            combinar(df['num_participantes'].between(*tamanho_grupo))
+        # Sem filtros o próprio DataFrame compartilhado é usado
+        return df if mascara is None else df[mascara]
+
+    def consultar(self, tabela, limite=None, deslocamento=0, **filtros):
+        """Uma página do histórico filtrado, como database.ler_historico, a partir da cópia em memória"""
+        df = self._filtrar(tabela, **filtros)
+        if limite is None:
+            return df.iloc[deslocamento:]
+        return df.iloc[deslocamento:deslocamento + limite]
+
+    def contar(self, tabela, **filtros):
+        """Quantos registros do histórico atendem aos filtros"""
+        return len(self._filtrar(tabela, **filtros))
+
+    def descartar(self, tabela=None):
+        """Descarta a cópia em memória de uma tabela do banco atual (ou de todas, de todos os bancos)"""
+        with self._lock:
+            if tabela is None:
+                self._tabelas.clear()
+            else:
+                self._tabelas.pop((banco_atual(), tabela), None)
+
+# Dataset compartilhado por todas as páginas e sessões do processo
+dataset_historico = DatasetHistorico()
@@ -0,0 +1,157 @@
+# Fila de escrita: um único thread grava os inserts de todas as sessões em commits agrupados
+
+import atexit
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+from cache import invalidar
+from database import garantir_db, get_db_connection, guilda_atual, na_guilda
+
+# Itens gravados no máximo por transação
+MAX_LOTE = 200
+
+# Quanto o primeiro item de um lote espera por outros antes do commit, em segundos
+ESPERA_MAXIMA = 0.05
+
+# Tempo máximo que uma página espera pela confirmação da gravação, em segundos
+TIMEOUT_CONFIRMACAO = 10
+
+_FIM = object()
+
+class FilaEscrita:
+    """
+    Fila de escrita compartilhada pelo processo.
+    Cada item é uma função (cursor, *args) que grava na transação recebida.
+    O thread escritor junta os itens que chegam em até ESPERA_MAXIMA segundos (ou MAX_LOTE itens)
+    em um único commit; cada item roda em um SAVEPOINT próprio, então um item com erro
+    não desfaz os outros do lote. Quem enfileira recebe um Future com o retorno da função.
+    """
+
+    def __init__(self, max_lote=MAX_LOTE, espera_maxima=ESPERA_MAXIMA):
+        self.max_lote = max_lote
+        self.espera_maxima = espera_maxima
+        self._fila = queue.Queue()
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def _iniciar(self):
+        # O thread só é criado na primeira escrita
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._executar, name="fila-escrita", daemon=True)
+                self._thread.start()
+
+    def enfileirar(self, tabelas, funcao, *args):
+        """
+        Agenda funcao(cursor, *args) para o próximo commit em grupo.
+        tabelas: nome (ou tupla de nomes) das tabelas alteradas, invalidadas no cache após o commit.
+        Retorna um Future que recebe o retorno da função ou a exceção da gravação.
+        """
+        futuro = Future()
+        if isinstance(tabelas, str):
+            tabelas = (tabelas,)
+        self._iniciar()
+        # O thread escritor grava no banco da guilda de quem enfileirou
+        self._fila.put((guilda_atual(), tuple(tabelas), funcao, args, futuro))
+        return futuro
+
+    def gravar(self, tabelas, funcao, *args, timeout=TIMEOUT_CONFIRMACAO):
+        """Enfileira e espera a confirmação; retorna o resultado ou levanta a exceção da gravação"""
+        return self.enfileirar(tabelas, funcao, *args).result(timeout)
+
+    def _coletar_lote(self, primeiro):
+        lote = [primeiro]
+        limite = time.monotonic() + self.espera_maxima
+        while len(lote) < self.max_lote:
+            restante = limite - time.monotonic()
+            if restante <= 0:
+                break
+            try:
+                item = self._fila.get(timeout=restante)
+            except queue.Empty:
+                break
+            if item is _FIM:
+                # Repõe o fim para encerrar depois de gravar o lote atual
+                self._fila.put(_FIM)
+                break
+            lote.append(item)
+        return lote
+
+    def _gravar_lote(self, lote):
+        # Uma transação por guilda presente no lote, cada uma no seu shard
+        por_guilda = {}
+        for guilda, *item in lote:
+            por_guilda.setdefault(guilda, []).append(item)
+        for guilda, itens in por_guilda.items():
+            try:
+                with na_guilda(guilda):
+                    garantir_db()
+                    self._gravar_itens(itens)
+            except Exception as e:
+                # Falha ao abrir ou migrar o shard vale só para os itens desta guilda
+                for _, _, _, futuro in itens:
+                    if not futuro.done():
+                        futuro.set_exception(e)
+
+    def _gravar_itens(self, lote):
+        resultados = []
+        try:
+            with get_db_connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute("BEGIN IMMEDIATE")
+                for tabelas, funcao, args, futuro in lote:
+                    cursor.execute("SAVEPOINT item")
+                    try:
+                        resultados.append((futuro, True, funcao(cursor, *args)))
+                        cursor.execute("RELEASE item")
+                    except Exception as e:
+                        cursor.execute("ROLLBACK TO item")
+                        cursor.execute("RELEASE item")
+                        resultados.append((futuro, False, e))
+                conn.commit()
+        except Exception as e:
+            # Falha do commit (ou da conexão) vale para todos os itens do lote
+            for _, _, _, futuro in lote:
+                futuro.set_exception(e)
+            return
+
+        tabelas = {tabela for (tabelas_item, _, _, _), (_, ok, _) in zip(lote, resultados) if ok
+                   for tabela in tabelas_item}
+        # Invalida antes de confirmar para o rerun de quem gravou já ver os dados novos
+        if tabelas:
+            invalidar(*tabelas)
+        for futuro, ok, valor in resultados:
+            if ok:
+                futuro.set_result(valor)
+            else:
+                futuro.set_exception(valor)
+
+    def _executar(self):
+        while True:
+            item = self._fila.get()
+            if item is _FIM:
+                return
+            lote = self._coletar_lote(item)
+            try:
+                self._gravar_lote(lote)
+            except Exception as e:
+                # Um lote com erro inesperado não pode derrubar o thread escritor
+                for _, _, _, _, futuro in lote:
+                    if not futuro.done():
+                        futuro.set_exception(e)
+
+    def encerrar(self, timeout=TIMEOUT_CONFIRMACAO):
+        """Grava o que ainda está na fila e encerra o thread escritor"""
+        with self._lock:
+            thread = self._thread
+            self._thread = None
+        if thread is not None and thread.is_alive():
+            self._fila.put(_FIM)
+            thread.join(timeout)
+
+# Fila compartilhada por todas as páginas e sessões do processo
+fila_escrita = FilaEscrita()
+
+atexit.register(fila_escrita.encerrar)
@@ -0,0 +1,112 @@
+# Exportação das tabelas de histórico para CSV ou Parquet, em blocos de tamanho fixo
+
+import csv
+
+from database import formatar_data, garantir_db, get_db_connection
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # Parquet é opcional; CSV funciona sem pyarrow
+    pa = None
+    pq = None
+
+# Linhas lidas do cursor e gravadas no arquivo por vez; a memória usada não depende do tamanho da tabela
+TAMANHO_BLOCO = 10000
+
+# Colunas exportadas de cada tabela e seus tipos (usados no schema do Parquet)
+COLUNAS_EXPORTACAO = {
+    'hunts_solo': [
+        ('id', 'int'), ('data', 'texto'), ('personagem', 'texto'), ('tipo_hunt', 'texto'),
+        ('lucro_itens', 'real'), ('descricao', 'texto'), ('created_at', 'texto'),
+    ],
+    'hunts_grupo': [
+        ('id', 'int'), ('data', 'texto'), ('personagens', 'texto'), ('num_participantes', 'int'),
+        ('valor_total', 'real'), ('observacoes', 'texto'), ('created_at', 'texto'),
+    ],
+    'mortes': [
+        ('id', 'int'), ('data', 'texto'), ('personagem', 'texto'), ('valor_perdido', 'real'),
+        ('descricao', 'texto'), ('created_at', 'texto'),
+    ],
+    'builds': [
+        ('id', 'int'), ('nome', 'texto'), ('tipo', 'texto'), ('personagem', 'texto'), ('arma', 'texto'),
+        ('secundaria', 'texto'), ('cabeca', 'texto'), ('peito', 'texto'), ('botas', 'texto'), ('capa', 'texto'),
+        ('potion', 'texto'), ('food', 'texto'), ('notas', 'texto'), ('created_at', 'texto'),
+    ],
+}
+
+FORMATOS = ('csv', 'parquet')
+
+def _montar_consulta(tabela, personagem=None, data_inicio=None, data_fim=None):
+    colunas = ", ".join(nome for nome, _ in COLUNAS_EXPORTACAO[tabela])
+    condicoes = []
+    parametros = []
+    if personagem:
+        if tabela == 'hunts_grupo':
+            condicoes.append("id IN (SELECT hunt_id FROM hunt_grupo_participantes WHERE personagem = ?)")
+        else:
+            condicoes.append("personagem = ?")
+        parametros.append(personagem)
+    # builds não tem data de registro, só de criação
+    coluna_data = 'date(created_at)' if tabela == 'builds' else 'data'
+    if data_inicio:
+        condicoes.append(f"{coluna_data} >= ?")
+        parametros.append(formatar_data(data_inicio))
+    if data_fim:
+        condicoes.append(f"{coluna_data} <= ?")
+        parametros.append(formatar_data(data_fim))
+    where = " WHERE " + " AND ".join(condicoes) if condicoes else ""
+    ordem = "id" if tabela == 'builds' else "data, id"
+    return f"SELECT {colunas} FROM {tabela}{where} ORDER BY {ordem}", parametros
+
+def _ler_blocos(tabela, tamanho_bloco, **filtros):
+    query, parametros = _montar_consulta(tabela, **filtros)
+    # Conexão somente leitura: em WAL a exportação não bloqueia quem está gravando
+    with get_db_connection(somente_leitura=True) as conn:
+        cursor = conn.execute(query, parametros)
+        while True:
+            linhas = cursor.fetchmany(tamanho_bloco)
+            if not linhas:
+                return
+            yield linhas
+
+def _schema_parquet(tabela):
+    tipos = {'int': pa.int64(), 'real': pa.float64(), 'texto': pa.string()}
+    return pa.schema([(nome, tipos[tipo]) for nome, tipo in COLUNAS_EXPORTACAO[tabela]])
+
+def exportar_tabela(tabela, destino, formato=None, tamanho_bloco=TAMANHO_BLOCO, **filtros):
+    """
+    Exporta uma tabela para CSV ou Parquet gravando bloco a bloco.
+    formato: 'csv' ou 'parquet'; se omitido, vem da extensão do destino.
+    filtros: personagem, data_inicio, data_fim
+    Retorna o número de linhas exportadas.
+    """
+    if tabela not in COLUNAS_EXPORTACAO:
+        raise ValueError(f"Tabela desconhecida: {tabela}")
+    formato = (formato or destino.rsplit('.', 1)[-1]).lower()
+    if formato not in FORMATOS:
+        raise ValueError(f"Formato desconhecido: {formato}")
+    if formato == 'parquet' and pa is None:
+        raise RuntimeError("Exportar para Parquet requer o pacote pyarrow")
+    garantir_db()
+
+    total = 0
+    nomes = [nome for nome, _ in COLUNAS_EXPORTACAO[tabela]]
+    if formato == 'csv':
+        with open(destino, 'w', newline='', encoding='utf-8') as f:
+            writer = csv.writer(f)
+            writer.writerow(nomes)
+            for linhas in _ler_blocos(tabela, tamanho_bloco, **filtros):
+                writer.writerows(linhas)
+                total += len(linhas)
+    else:
+        schema = _schema_parquet(tabela)
+        with pq.ParquetWriter(destino, schema) as writer:
+            for linhas in _ler_blocos(tabela, tamanho_bloco, **filtros):
+                colunas = list(zip(*linhas))
+                writer.write_table(pa.Table.from_arrays(
+                    [pa.array(valores, type=campo.type) for valores, campo in zip(colunas, schema)],
+                    schema=schema,
+                ))
+                total += len(linhas)
+    return total
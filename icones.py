@@ -0,0 +1,217 @@
+# Cache local dos ícones de itens, servidos como data URIs embutidos no HTML
+
+import base64
+import hashlib
+import json
+import os
+import queue
+import threading
+import time
+import urllib.request
+
+# URL base das imagens de itens do Albion
+ALBION_RENDER_URL = "https://render.albiononline.com/v1/item/"
+
+# Blobs gravados por conteúdo (<sha256>.png) e índice item_id -> sha256
+DIRETORIO_CACHE = "data/icones"
+
+# Diretório opcional com ícones já baixados, nomeados <ITEM_ID>.png
+DIRETORIO_LOCAL = os.environ.get("ALBION_ICONES_DIR")
+
+# Com ALBION_ICONES_OFFLINE=1 o render service nunca é consultado
+OFFLINE = os.environ.get("ALBION_ICONES_OFFLINE") == "1"
+
+# Tempo antes de tentar de novo um ícone que não pôde ser obtido, em segundos
+ESPERA_FALHA = 600
+
+# Imagem local (quadro vazio) para slots sem item e, offline, para ícones ainda sem cache
+ICONE_VAZIO = "data:image/svg+xml;base64," + base64.b64encode(
+    b'<svg xmlns="http://www.w3.org/2000/svg" width="96" height="96" viewBox="0 0 96 96">'
+    b'<rect x="8" y="8" width="80" height="80" rx="8" fill="none" stroke="#4e4e4e" stroke-width="2"/></svg>'
+).decode('ascii')
+
+def buscar_diretorio_local(item_id, diretorio=None):
+    """Buscador que lê <ITEM_ID>.png de um diretório local"""
+    diretorio = diretorio or DIRETORIO_LOCAL
+    if not diretorio:
+        return None
+    caminho = os.path.join(diretorio, f"{item_id}.png")
+    if os.path.exists(caminho):
+        with open(caminho, 'rb') as f:
+            return f.read()
+    return None
+
+def buscar_render_service(item_id, tamanho=96, timeout=5):
+    """Buscador que baixa o ícone do render service do Albion"""
+    if OFFLINE:
+        return None
+    url = f"{ALBION_RENDER_URL}{item_id}.png?size={tamanho}"
+    try:
+        with urllib.request.urlopen(url, timeout=timeout) as resposta:
+            return resposta.read()
+    except Exception as e:
+        print(f"Erro ao baixar ícone {item_id}: {str(e)}")
+        return None
+
+class IconStore:
+    """
+    Ícones de itens guardados em disco por hash do conteúdo.
+    Um ícone ausente é pedido aos buscadores na ordem (funções item_id -> bytes ou None);
+    o resultado fica no cache e é servido como data URI, então uma página de builds
+    não faz nenhuma requisição de imagem.
+    """
+
+    def __init__(self, diretorio=DIRETORIO_CACHE, buscadores=None):
+        self.diretorio = diretorio
+        self.buscadores = buscadores if buscadores is not None else [buscar_diretorio_local, buscar_render_service]
+        self._lock = threading.Lock()
+        self._indice = None
+        self._mtime_indice = None
+        # Incrementada a cada ícone novo no cache (deste ou de outro processo)
+        self._geracao = 0
+        self._data_uris = {}
+        self._falhas = {}
+        # Busca em segundo plano dos ícones que faltam na renderização
+        self._fila = queue.Queue()
+        self._pendentes = set()
+        self._thread = None
+
+    @property
+    def _arquivo_indice(self):
+        return os.path.join(self.diretorio, "indice.json")
+
+    def _mtime_arquivo_indice(self):
+        try:
+            return os.stat(self._arquivo_indice).st_mtime_ns
+        except OSError:
+            return None
+
+    def _carregar_indice(self):
+        # Relê o índice quando o arquivo muda (ex.: scripts/baixar_icones.py rodando em outro processo)
+        mtime = self._mtime_arquivo_indice()
+        if self._indice is None or mtime != self._mtime_indice:
+            recarga = self._indice is not None
+            try:
+                with open(self._arquivo_indice, 'r', encoding='utf-8') as f:
+                    self._indice = json.load(f)
+            except (OSError, ValueError):
+                self._indice = self._indice if self._indice is not None else {}
+            self._mtime_indice = mtime
+            if recarga:
+                self._geracao += 1
+        return self._indice
+
+    def _salvar_indice(self):
+        temporario = self._arquivo_indice + ".tmp"
+        with open(temporario, 'w', encoding='utf-8') as f:
+            json.dump(self._indice, f)
+        os.replace(temporario, self._arquivo_indice)
+        self._mtime_indice = self._mtime_arquivo_indice()
+
+    def _guardar(self, item_id, conteudo):
+        os.makedirs(self.diretorio, exist_ok=True)
+        hash_conteudo = hashlib.sha256(conteudo).hexdigest()
+        caminho = os.path.join(self.diretorio, f"{hash_conteudo}.png")
+        # Ícones iguais (variações que renderizam a mesma imagem) ocupam um único arquivo
+        if not os.path.exists(caminho):
+            with open(caminho, 'wb') as f:
+                f.write(conteudo)
+        self._indice[item_id] = hash_conteudo
+        self._salvar_indice()
+        self._geracao += 1
+
+    @property
+    def geracao(self):
+        """Muda sempre que um ícone entra no cache; usada na chave dos cards memorizados"""
+        with self._lock:
+            self._carregar_indice()
+            return self._geracao
+
+    def obter_bytes(self, item_id, buscar=True):
+        """
+        Retorna o PNG do item; None se indisponível.
+        Com buscar=True um ícone ausente é pedido aos buscadores e guardado no cache;
+        com buscar=False só o cache em disco é lido.
+        """
+        if not item_id:
+            return None
+        with self._lock:
+            hash_conteudo = self._carregar_indice().get(item_id)
+            if hash_conteudo:
+                try:
+                    with open(os.path.join(self.diretorio, f"{hash_conteudo}.png"), 'rb') as f:
+                        return f.read()
+                except OSError:
+                    del self._indice[item_id]
+            if not buscar or time.monotonic() < self._falhas.get(item_id, 0):
+                return None
+
+        for buscador in self.buscadores:
+            conteudo = buscador(item_id)
+            if conteudo:
+                with self._lock:
+                    self._guardar(item_id, conteudo)
+                return conteudo
+
+        with self._lock:
+            self._falhas[item_id] = time.monotonic() + ESPERA_FALHA
+        return None
+
+    def data_uri(self, item_id, buscar=True):
+        """Retorna o ícone como data URI, ou None se não houver imagem disponível"""
+        uri = self._data_uris.get(item_id)
+        if uri is None:
+            conteudo = self.obter_bytes(item_id, buscar)
+            if conteudo is None:
+                return None
+            uri = "data:image/png;base64," + base64.b64encode(conteudo).decode('ascii')
+            self._data_uris[item_id] = uri
+        return uri
+
+    def pre_carregar(self, item_ids):
+        """Garante no cache os ícones informados; retorna quantos estão disponíveis"""
+        return sum(1 for item_id in item_ids if self.obter_bytes(item_id) is not None)
+
+    def buscar_em_segundo_plano(self, item_id):
+        """Agenda a busca de um ícone ausente sem bloquear quem chamou"""
+        if not item_id:
+            return
+        with self._lock:
+            if item_id in self._pendentes or time.monotonic() < self._falhas.get(item_id, 0):
+                return
+            self._pendentes.add(item_id)
+            # O thread só é criado na primeira busca
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._executar_buscas, name="busca-icones", daemon=True)
+                self._thread.start()
+        self._fila.put(item_id)
+
+    def _executar_buscas(self):
+        while True:
+            item_id = self._fila.get()
+            try:
+                self.obter_bytes(item_id)
+            except Exception as e:
+                print(f"Erro ao buscar ícone {item_id}: {str(e)}")
+            finally:
+                with self._lock:
+                    self._pendentes.discard(item_id)
+
+# Loja compartilhada por todas as páginas e sessões do processo
+loja_icones = IconStore()
+
+def url_icone(item_id):
+    """
+    URL para o src de um <img>: o data URI do cache local quando existe,
+    senão o endereço do render service (carregado pelo navegador), ou ICONE_VAZIO
+    para slots sem item e, com ALBION_ICONES_OFFLINE=1, para qualquer ícone fora do cache.
+    Só lê o disco; um ícone ausente é buscado em segundo plano e aparece
+    nos cards depois que entra no cache (loja_icones.geracao muda).
+    """
+    if not item_id:
+        return ICONE_VAZIO
+    uri = loja_icones.data_uri(item_id, buscar=False)
+    if uri is None:
+        loja_icones.buscar_em_segundo_plano(item_id)
+        return ICONE_VAZIO if OFFLINE else ALBION_RENDER_URL + item_id + '.png'
+    return uri
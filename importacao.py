@@ -0,0 +1,171 @@
+# Importação em lote de hunts e mortes a partir de arquivos CSV ou JSONL
+
+import csv
+import json
+import os
+import time
+from datetime import datetime
+
+from cache import invalidar
+from database import cadastrar_personagens, garantir_db, get_db_connection, inserir_hunt_grupo, separar_personagens
+
+# Registros gravados por transação
+TAMANHO_LOTE = 5000
+
+TIPOS_HUNT = ("Solo", "Corrupted", "HCE")
+
+# Quantos erros de validação são guardados para o relatório (todos são contados)
+MAX_ERROS_RELATADOS = 100
+
+# Colunas esperadas em cada tabela (mesmos nomes dos CSVs de scripts/init_csv.py)
+COLUNAS_IMPORTACAO = {
+    'hunts_solo': ['data', 'personagem', 'tipo_hunt', 'lucro_itens', 'descricao'],
+    'hunts_grupo': ['data', 'personagens', 'valor_total', 'observacoes'],
+    'mortes': ['data', 'personagem', 'valor_perdido', 'descricao'],
+}
+
+class ErroValidacao(ValueError):
+    """Registro com dados inválidos"""
+
+def ler_registros(caminho):
+    """Lê o arquivo linha a linha, sem carregá-lo inteiro, gerando dicionários por registro"""
+    with open(caminho, 'r', encoding='utf-8', newline='') as f:
+        if caminho.lower().endswith(('.jsonl', '.ndjson')):
+            for linha in f:
+                if linha.strip():
+                    yield json.loads(linha)
+        else:
+            yield from csv.DictReader(f)
+
+def _validar_data(valor):
+    valor = str(valor or '').strip()
+    for formato in ('%Y-%m-%d', '%d/%m/%Y'):
+        try:
+            return datetime.strptime(valor, formato).strftime('%Y-%m-%d')
+        except ValueError:
+            pass
+    raise ErroValidacao(f"data inválida: {valor!r}")
+
+def _validar_valor(valor, campo):
+    try:
+        numero = float(valor)
+    except (TypeError, ValueError):
+        raise ErroValidacao(f"{campo} inválido: {valor!r}")
+    if numero < 0:
+        raise ErroValidacao(f"{campo} negativo: {valor!r}")
+    # Prata é sempre inteira
+    return round(numero)
+
+def _validar_texto(valor, campo):
+    valor = str(valor or '').strip()
+    if not valor:
+        raise ErroValidacao(f"{campo} vazio")
+    return valor
+
+def validar_registro(tabela, registro):
+    """Valida e normaliza um registro, retornando os valores na ordem de COLUNAS_IMPORTACAO"""
+    data = _validar_data(registro.get('data'))
+    if tabela == 'hunts_solo':
+        tipo_hunt = str(registro.get('tipo_hunt') or '').strip()
+        if tipo_hunt not in TIPOS_HUNT:
+            raise ErroValidacao(f"tipo_hunt inválido: {tipo_hunt!r}")
+        return (data, _validar_texto(registro.get('personagem'), 'personagem'), tipo_hunt,
+                _validar_valor(registro.get('lucro_itens'), 'lucro_itens'), registro.get('descricao') or None)
+    if tabela == 'hunts_grupo':
+        personagens = separar_personagens(registro.get('personagens') or '')
+        if not personagens:
+            raise ErroValidacao("personagens vazio")
+        return (data, personagens, _validar_valor(registro.get('valor_total'), 'valor_total'),
+                registro.get('observacoes') or None)
+    if tabela == 'mortes':
+        return (data, _validar_texto(registro.get('personagem'), 'personagem'),
+                _validar_valor(registro.get('valor_perdido'), 'valor_perdido'), registro.get('descricao') or None)
+    raise ValueError(f"Tabela desconhecida: {tabela}")
+
+def _gravar_lote(conn, tabela, lote):
+    cursor = conn.cursor()
+    if tabela == 'hunts_grupo':
+        cadastrar_personagens(cursor, (nome for registro in lote for nome in registro[1]))
+        # Cada hunt precisa do próprio id para os participantes
+        for data, personagens, valor_total, observacoes in lote:
+            inserir_hunt_grupo(cursor, data, personagens, valor_total, observacoes)
+    else:
+        # Nomes novos são cadastrados uma vez por lote; cada linha pega o personagem_id por subconsulta
+        cadastrar_personagens(cursor, (registro[1] for registro in lote))
+        colunas = COLUNAS_IMPORTACAO[tabela]
+        marcadores = ", ".join("?" for _ in colunas)
+        cursor.executemany(f"""
+            INSERT INTO {tabela} ({', '.join(colunas)}, personagem_id)
+            VALUES ({marcadores}, (SELECT id FROM personagens WHERE nome = ?))
+        """, (registro + (registro[1],) for registro in lote))
+
+def importar_arquivo(caminho, tabela, tamanho_lote=TAMANHO_LOTE, recomecar=False, ao_progredir=None):
+    """
+    Importa um arquivo CSV/JSONL para a tabela, em transações de `tamanho_lote` registros.
+    O progresso fica gravado na tabela importacoes na mesma transação de cada lote;
+    rodar de novo depois de uma falha continua do último lote confirmado.
+    ao_progredir(lidos, importados, segundos) é chamado após cada lote.
+    Retorna um dicionário com as contagens e a vazão em registros por segundo.
+    """
+    if tabela not in COLUNAS_IMPORTACAO:
+        raise ValueError(f"Tabela desconhecida: {tabela}")
+    garantir_db()
+    arquivo = os.path.abspath(caminho)
+
+    with get_db_connection() as conn:
+        if recomecar:
+            conn.execute("DELETE FROM importacoes WHERE arquivo = ? AND tabela = ?", (arquivo, tabela))
+            conn.commit()
+        linha = conn.execute(
+            "SELECT linhas FROM importacoes WHERE arquivo = ? AND tabela = ?", (arquivo, tabela)
+        ).fetchone()
+        ja_processados = linha[0] if linha else 0
+
+        inicio = time.perf_counter()
+        lidos = confirmados = ja_processados
+        importados = invalidos = 0
+        erros = []
+        lote = []
+
+        def confirmar():
+            nonlocal importados, confirmados
+            _gravar_lote(conn, tabela, lote)
+            conn.execute("""
+                INSERT INTO importacoes (arquivo, tabela, linhas, atualizado_em)
+                VALUES (?, ?, ?, CURRENT_TIMESTAMP)
+                ON CONFLICT (arquivo, tabela) DO UPDATE SET linhas = excluded.linhas, atualizado_em = excluded.atualizado_em
+            """, (arquivo, tabela, lidos))
+            conn.commit()
+            importados += len(lote)
+            confirmados = lidos
+            lote.clear()
+            if ao_progredir:
+                ao_progredir(lidos, importados, time.perf_counter() - inicio)
+
+        for numero, registro in enumerate(ler_registros(caminho), start=1):
+            if numero <= ja_processados:
+                continue
+            lidos = numero
+            try:
+                lote.append(validar_registro(tabela, registro))
+            except ErroValidacao as e:
+                invalidos += 1
+                if len(erros) < MAX_ERROS_RELATADOS:
+                    erros.append((numero, str(e)))
+            if len(lote) >= tamanho_lote:
+                confirmar()
+        if lidos > confirmados:
+            confirmar()
+
+    if importados:
+        # Nomes novos nos registros foram cadastrados por cadastrar_personagens em cada lote
+        invalidar(tabela, 'personagens')
+    segundos = time.perf_counter() - inicio
+    return {
+        'importados': importados,
+        'pulados': ja_processados,
+        'invalidos': invalidos,
+        'erros': erros,
+        'segundos': segundos,
+        'registros_por_segundo': importados / segundos if segundos > 0 else 0,
+    }
@@ -0,0 +1,222 @@
+# Medição opcional das consultas SQL: tempos por comando, percentis e log de consultas lentas
+
+import json
+import os
+import re
+import sqlite3
+import sys
+import threading
+import time
+from collections import deque
+from datetime import datetime
+
+# Desligada por padrão; ALBION_SQL_METRICAS=1 faz o pool abrir conexões instrumentadas
+ATIVA = os.environ.get("ALBION_SQL_METRICAS") == "1"
+
+# Consultas acima deste tempo, em milissegundos, vão para o log de consultas lentas
+LIMITE_LENTA_MS = float(os.environ.get("ALBION_SQL_LENTA_MS", "200"))
+
+ARQUIVO_LENTAS = os.environ.get("ALBION_SQL_LOG", "data/consultas_lentas.jsonl")
+
+# Com ALBION_SQL_EXPLAIN=1 o plano (EXPLAIN QUERY PLAN) das consultas lentas também é gravado
+CAPTURAR_PLANO = os.environ.get("ALBION_SQL_EXPLAIN") == "1"
+
+# Execuções mais recentes guardadas por comando para os percentis
+JANELA = 500
+
+_lock = threading.Lock()
+# sql normalizado -> estatísticas do comando
+_estatisticas = {}
+
+_ESPACOS = re.compile(r"\s+")
+
+def normalizar_sql(sql):
+    """SQL em uma linha, usado como chave das estatísticas"""
+    return _ESPACOS.sub(" ", sql).strip()
+
+def _pagina_chamadora():
+    # Primeiro frame que vem de um script de página (pages/*.py ou main.py)
+    frame = sys._getframe(2)
+    while frame is not None:
+        arquivo = frame.f_code.co_filename
+        if os.sep + "pages" + os.sep in arquivo or os.path.basename(arquivo) == "main.py":
+            return os.path.basename(arquivo)
+        frame = frame.f_back
+    return "outro"
+
+def _percentil(ordenados, p):
+    if not ordenados:
+        return 0.0
+    return ordenados[min(len(ordenados) - 1, int(p * len(ordenados)))]
+
+def registrar(sql, duracao_ms, linhas, pagina, plano=None):
+    """Soma uma execução às estatísticas e grava no log se passou do limite"""
+    chave = normalizar_sql(sql)
+    with _lock:
+        estatistica = _estatisticas.get(chave)
+        if estatistica is None:
+            estatistica = _estatisticas[chave] = {
+                'execucoes': 0, 'linhas': 0, 'total_ms': 0.0, 'max_ms': 0.0,
+                'duracoes': deque(maxlen=JANELA), 'paginas': set(),
+            }
+        estatistica['execucoes'] += 1
+        estatistica['linhas'] += max(linhas, 0)
+        estatistica['total_ms'] += duracao_ms
+        estatistica['max_ms'] = max(estatistica['max_ms'], duracao_ms)
+        estatistica['duracoes'].append(duracao_ms)
+        estatistica['paginas'].add(pagina)
+
+    if duracao_ms >= LIMITE_LENTA_MS:
+        registro = {
+            'quando': datetime.now().isoformat(timespec='seconds'),
+            'duracao_ms': round(duracao_ms, 3),
+            'linhas': linhas,
+            'pagina': pagina,
+            'sql': chave,
+        }
+        if plano is not None:
+            registro['plano'] = plano
+        try:
+            os.makedirs(os.path.dirname(ARQUIVO_LENTAS) or '.', exist_ok=True)
+            with _lock, open(ARQUIVO_LENTAS, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(registro, ensure_ascii=False) + "\n")
+        except OSError as e:
+            print(f"Erro ao gravar log de consultas lentas: {str(e)}")
+
+def resumo():
+    """Estatísticas por comando (execuções, linhas, média, p50, p95, máximo), do mais lento para o mais rápido em p95"""
+    with _lock:
+        itens = [(sql, dict(e, duracoes=sorted(e['duracoes']), paginas=sorted(e['paginas'])))
+                 for sql, e in _estatisticas.items()]
+    linhas = []
+    for sql, e in itens:
+        linhas.append({
+            'sql': sql,
+            'paginas': ", ".join(e['paginas']),
+            'execucoes': e['execucoes'],
+            'linhas': e['linhas'],
+            'media_ms': e['total_ms'] / e['execucoes'],
+            'p50_ms': _percentil(e['duracoes'], 0.50),
+            'p95_ms': _percentil(e['duracoes'], 0.95),
+            'max_ms': e['max_ms'],
+        })
+    return sorted(linhas, key=lambda linha: linha['p95_ms'], reverse=True)
+
+def limpar():
+    """Zera as estatísticas acumuladas"""
+    with _lock:
+        _estatisticas.clear()
+
+def ler_lentas(limite=100):
+    """Últimas consultas lentas gravadas no log, da mais recente para a mais antiga"""
+    try:
+        with open(ARQUIVO_LENTAS, 'r', encoding='utf-8') as f:
+            ultimas = deque(f, maxlen=limite)
+    except OSError:
+        return []
+    return [json.loads(linha) for linha in reversed(ultimas) if linha.strip()]
+
+class CursorInstrumentado(sqlite3.Cursor):
+    """
+    Cursor que mede cada comando desde o execute até a última linha lida.
+    A medição termina no próximo execute, quando as linhas acabam ou quando o cursor é fechado/descartado.
+    """
+
+    _medicao = None
+
+    def _iniciar(self, sql, parametros, varios=False):
+        self._finalizar()
+        self._medicao = [sql, parametros, varios, time.perf_counter(), 0.0, 0, _pagina_chamadora()]
+
+    def _medir(self, inicio, linhas):
+        if self._medicao is not None:
+            self._medicao[4] += time.perf_counter() - inicio
+            self._medicao[5] += linhas
+
+    def _finalizar(self):
+        medicao, self._medicao = self._medicao, None
+        if medicao is None:
+            return
+        sql, parametros, varios, _, segundos, linhas, pagina = medicao
+        if varios or not sql.lstrip().upper().startswith(("SELECT", "WITH")):
+            linhas = max(linhas, self.rowcount)
+        duracao_ms = segundos * 1000
+        plano = None
+        if CAPTURAR_PLANO and not varios and duracao_ms >= LIMITE_LENTA_MS:
+            try:
+                plano = [linha[-1] for linha in sqlite3.Cursor(self.connection).execute(
+                    "EXPLAIN QUERY PLAN " + sql, parametros).fetchall()]
+            except sqlite3.Error:
+                plano = None
+        registrar(sql, duracao_ms, linhas, pagina, plano)
+
+    def execute(self, sql, parametros=()):
+        self._iniciar(sql, parametros)
+        inicio = time.perf_counter()
+        try:
+            return super().execute(sql, parametros)
+        finally:
+            self._medir(inicio, 0)
+
+    def executemany(self, sql, sequencia):
+        self._iniciar(sql, (), varios=True)
+        inicio = time.perf_counter()
+        try:
+            return super().executemany(sql, sequencia)
+        finally:
+            self._medir(inicio, 0)
+            self._finalizar()
+
+    def fetchone(self):
+        inicio = time.perf_counter()
+        linha = super().fetchone()
+        self._medir(inicio, linha is not None)
+        if linha is None:
+            self._finalizar()
+        return linha
+
+    def fetchmany(self, size=None):
+        inicio = time.perf_counter()
+        linhas = super().fetchmany(self.arraysize if size is None else size)
+        self._medir(inicio, len(linhas))
+        if not linhas:
+            self._finalizar()
+        return linhas
+
+    def fetchall(self):
+        inicio = time.perf_counter()
+        linhas = super().fetchall()
+        self._medir(inicio, len(linhas))
+        self._finalizar()
+        return linhas
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        linha = self.fetchone()
+        if linha is None:
+            raise StopIteration
+        return linha
+
+    def close(self):
+        self._finalizar()
+        super().close()
+
+    def __del__(self):
+        try:
+            self._finalizar()
+        except Exception:
+            pass
+
+class ConexaoInstrumentada(sqlite3.Connection):
+    """Conexão cujos cursores (inclusive os de conn.execute) são CursorInstrumentado"""
+
+    def cursor(self, factory=CursorInstrumentado):
+        return super().cursor(factory)
+
+    def execute(self, sql, parametros=()):
+        return self.cursor().execute(sql, parametros)
+
+    def executemany(self, sql, sequencia):
+        return self.cursor().executemany(sql, sequencia)
@@ -1,7 +1,9 @@
 import streamlit as st
 from config import PAGINA_TITULO, PAGINA_ICONE
-from database import get_db_connection
-import pandas as pd
+from database import adicionar_personagem, criar_guilda, get_dashboard_summary, listar_guildas
+from perfil import iniciar_perfil
+from series import JANELA_PADRAO, serie_lucro
+from sessao import iniciar_sessao
 
 # Configuração da página
 st.set_page_config(
@@ -10,8 +12,51 @@ st.set_page_config(
     layout="wide",
     initial_sidebar_state="expanded"  # Mantém o sidebar sempre aberto
 )
+
+# Tempos das fases desta renderização (com ?perfil=1 ou ALBION_PERFIL=1)
+perfil = iniciar_perfil("Dashboard")
+
+# Banco da guilda da sessão (schema inicializado uma vez por processo e banco)
+guilda = iniciar_sessao()
+perfil.marcar("inicializar_db")
+
+def trocar_guilda(nova):
+    # A URL tem precedência na sessão, então a troca atualiza os dois
+    st.session_state.guilda = nova
+    if nova:
+        st.query_params["guilda"] = nova
+    else:
+        st.query_params.pop("guilda", None)
+    st.rerun()
+
 # Sidebar
 with st.sidebar:
+    # Cada guilda tem o próprio banco (data/guildas/<nome>.db); "Padrão" é o data/albion.db
+    guildas = [None] + listar_guildas()
+    escolhida = st.selectbox("Guilda", guildas, index=guildas.index(guilda),
+                             format_func=lambda nome: nome or "Padrão")
+    if escolhida != guilda:
+        trocar_guilda(escolhida)
+    with st.expander("Nova guilda"):
+        nova_guilda = st.text_input("Nome (letras, números, - e _)")
+        if st.button("Criar e usar") and nova_guilda:
+            try:
+                criar_guilda(nova_guilda.strip())
+            except ValueError as e:
+                st.error(str(e))
+            else:
+                trocar_guilda(nova_guilda.strip())
+    # Personagens da guilda atual, usados nos formulários de todas as páginas
+    with st.expander("Personagens"):
+        novo_personagem = st.text_input("Novo personagem")
+        if st.button("Adicionar") and novo_personagem.strip():
+            try:
+                if adicionar_personagem(novo_personagem):
+                    st.success(f"{novo_personagem.strip()} adicionado!")
+                else:
+                    st.info(f"{novo_personagem.strip()} já está cadastrado.")
+            except Exception as e:
+                st.error(f"Erro ao adicionar personagem: {str(e)}")
     st.write("Desenvolvido com ❤️ pelo przdeCenoura")
 
 # Estilo CSS personalizado
@@ -53,33 +98,14 @@ st.markdown("""
 # Título principal estilizado
 st.markdown("<h1 class='main-title'>Dashboard Albion Stats ⚔️</h1>", unsafe_allow_html=True)
 
-# Funções para buscar estatísticas
-def get_total_hunts_solo():
-    try:
-        with get_db_connection() as conn:
-            cursor = conn.cursor()
-            cursor.execute("SELECT COUNT(*) FROM hunts_solo")
-            return cursor.fetchone()[0]
-    except Exception:
-        return 0
-
-def get_total_hunts_grupo():
-    try:
-        with get_db_connection() as conn:
-            cursor = conn.cursor()
-            cursor.execute("SELECT COUNT(*) FROM hunts_grupo")
-            return cursor.fetchone()[0]
-    except Exception:
-        return 0
-
-def get_total_mortes():
-    try:
-        with get_db_connection() as conn:
-            cursor = conn.cursor()
-            cursor.execute("SELECT COUNT(*) FROM mortes")
-            return cursor.fetchone()[0]
-    except Exception:
-        return 0
+# Buscar todas as estatísticas do dashboard de uma vez
+try:
+    resumo = get_dashboard_summary(days=30)
+except Exception as e:
+    st.error(f"Erro ao carregar estatísticas: {str(e)}")
+    resumo = {'total_hunts_solo': 0, 'total_hunts_grupo': 0, 'total_mortes': 0, 'atividade': None}
+
+perfil.marcar("carregar")
 
 # Métricas principais com cards estilizados
 col1, col2, col3 = st.columns(3)
@@ -88,7 +114,7 @@ with col1:
     st.markdown(f"""
     <div class="metric-card">
         <div class="metric-label">Total de Hunts Solo</div>
-        <div class="metric-value">{get_total_hunts_solo()}</div>
+        <div class="metric-value">{resumo['total_hunts_solo']}</div>
     </div>
     """, unsafe_allow_html=True)
     
@@ -96,7 +122,7 @@ with col2:
     st.markdown(f"""
     <div class="metric-card">
         <div class="metric-label">Total de Hunts em Grupo</div>
-        <div class="metric-value">{get_total_hunts_grupo()}</div>
+        <div class="metric-value">{resumo['total_hunts_grupo']}</div>
     </div>
     """, unsafe_allow_html=True)
     
@@ -104,51 +130,46 @@ with col3:
     st.markdown(f"""
     <div class="metric-card">
         <div class="metric-label">Total de Mortes</div>
-        <div class="metric-value">{get_total_mortes()}</div>
+        <div class="metric-value">{resumo['total_mortes']}</div>
     </div>
     """, unsafe_allow_html=True)
 
+perfil.marcar("cards")
+
 # Gráfico de atividades recentes
 st.markdown("<h2 style='color: #00ff88; margin-top: 40px;'>Atividades Recentes</h2>", unsafe_allow_html=True)
 
-# Buscar dados para o gráfico
+# Últimos 30 dias de atividades, já no formato do gráfico (uma coluna por tipo)
+if resumo['atividade'] is not None:
+    st.line_chart(resumo['atividade'])
+
+perfil.marcar("grafico")
+
+# Lucro líquido (hunts - mortes) por período, a partir dos agregados diários
+st.markdown("<h2 style='color: #00ff88; margin-top: 40px;'>Lucro Líquido</h2>", unsafe_allow_html=True)
+
+col1, col2 = st.columns(2)
+with col1:
+    periodo = st.radio("Período", ["dia", "semana", "mes"], horizontal=True,
+                       format_func={"dia": "Dia", "semana": "Semana", "mes": "Mês"}.get)
+with col2:
+    visao = st.radio("Visão", ["Acumulado", "Média móvel", "Por período"], horizontal=True)
+
 try:
-    with get_db_connection() as conn:
-        # Últimos 30 dias de atividades
-        df_solo = pd.read_sql("""
-            SELECT date(data) as data, COUNT(*) as quantidade, 'Solo' as tipo
-            FROM hunts_solo
-            WHERE data >= date('now', '-30 days')
-            GROUP BY date(data)
-        """, conn)
-        
-        df_grupo = pd.read_sql("""
-            SELECT date(data) as data, COUNT(*) as quantidade, 'Grupo' as tipo
-            FROM hunts_grupo
-            WHERE data >= date('now', '-30 days')
-            GROUP BY date(data)
-        """, conn)
-        
-        df_mortes = pd.read_sql("""
-            SELECT date(data) as data, COUNT(*) as quantidade, 'Morte' as tipo
-            FROM mortes
-            WHERE data >= date('now', '-30 days')
-            GROUP BY date(data)
-        """, conn)
-        
-        # Combinar todos os dados
-        df_chart = pd.concat([df_solo, df_grupo, df_mortes])
-        df_chart['data'] = pd.to_datetime(df_chart['data'])
-        
-        # Criar gráfico
-        chart_data = pd.pivot_table(
-            df_chart,
-            values='quantidade',
-            index='data',
-            columns='tipo',
-            fill_value=0
-        )
-        
-        st.line_chart(chart_data)
+    serie = serie_lucro(periodo)
+    dados_grafico = {
+        "Acumulado": serie.acumulado,
+        "Média móvel": serie.media_movel,
+        "Por período": serie.lucro,
+    }[visao]
+    if dados_grafico.empty:
+        st.info("Nenhum registro para o gráfico de lucro.")
+    else:
+        if visao == "Média móvel":
+            st.caption(f"Média dos últimos {JANELA_PADRAO} períodos")
+        st.line_chart(dados_grafico)
 except Exception as e:
-    st.error(f"Erro ao carregar o gráfico: {str(e)}")
+    st.error(f"Erro ao carregar lucro líquido: {str(e)}")
+
+perfil.marcar("grafico_lucro")
+perfil.exibir()
@@ -1,37 +1,48 @@
 import streamlit as st
 import pandas as pd
 from datetime import datetime
-from database import get_db_connection, init_db
+from database import get_db_connection, resumir_hunts_solo, inserir_hunt_solo
 from config import get_personagens
+from cache import invalidar
+from dataset import dataset_historico
+from escrita import fila_escrita
+from perfil import iniciar_perfil
+from sessao import iniciar_sessao
 
 st.set_page_config(page_title="Hunts Solo", page_icon="🎯", layout='wide')
 
-# Inicializar banco de dados
-init_db()
+# Tempos das fases desta renderização (com ?perfil=1 ou ALBION_PERFIL=1)
+perfil = iniciar_perfil("Hunts Solo")
 
-# Função para carregar os dados do banco
-def carregar_dados():
+# Banco da guilda da sessão (schema inicializado uma vez por processo e banco)
+iniciar_sessao()
+perfil.marcar("inicializar_db")
+
+# Registros exibidos por página no histórico
+TAMANHO_PAGINA = 50
+
+# Função para carregar uma página do histórico, a partir do dataset compartilhado entre sessões
+def carregar_dados(filtros, pagina=1):
     try:
-        with get_db_connection() as conn:
-            query = "SELECT * FROM hunts_solo ORDER BY data DESC"
-            df = pd.read_sql_query(query, conn)
-            # Converter a coluna de data para datetime e depois para o formato brasileiro
-            df['data'] = pd.to_datetime(df['data']).dt.strftime('%d/%m/%Y')
-            return df
+        # A data vem como datetime64; o formato brasileiro é aplicado só na exibição
+        return dataset_historico.consultar('hunts_solo', limite=TAMANHO_PAGINA, deslocamento=(pagina - 1) * TAMANHO_PAGINA, **filtros)
     except Exception as e:
         st.error(f"Erro ao carregar dados: {str(e)}")
         return pd.DataFrame(columns=['id', 'data', 'personagem', 'tipo_hunt', 'lucro_itens', 'descricao'])
 
+# Função para contar os registros filtrados, para a paginação
+def contar_registros(filtros):
+    try:
+        return dataset_historico.contar('hunts_solo', **filtros)
+    except Exception as e:
+        st.error(f"Erro ao contar registros: {str(e)}")
+        return 0
+
 # Função para salvar hunt no banco
 def salvar_hunt(data, personagem, tipo_hunt, lucro_itens, descricao):
     try:
-        with get_db_connection() as conn:
-            cursor = conn.cursor()
-            cursor.execute("""
-                INSERT INTO hunts_solo (data, personagem, tipo_hunt, lucro_itens, descricao)
-                VALUES (?, ?, ?, ?, ?)
-            """, (data.strftime('%Y-%m-%d'), personagem, tipo_hunt, lucro_itens, descricao))
-            conn.commit()
+        # Gravado pela fila de escrita em um commit agrupado com as outras sessões
+        fila_escrita.gravar('hunts_solo', inserir_hunt_solo, data, personagem, tipo_hunt, lucro_itens, descricao)
         return True
     except Exception as e:
         st.error(f"Erro ao salvar dados: {str(e)}")
@@ -44,6 +55,7 @@ def deletar_hunt(id):
             cursor = conn.cursor()
             cursor.execute("DELETE FROM hunts_solo WHERE id = ?", (id,))
             conn.commit()
+        invalidar('hunts_solo')
         return True
     except Exception as e:
         st.error(f"Erro ao deletar registro: {str(e)}")
@@ -54,9 +66,9 @@ with st.sidebar:
     st.title("Filtros")
     personagem_filtro = st.selectbox(
         "Personagem",
-        options=["Todos"] + get_personagens()
+        options=["Todos", *get_personagens()]
     )
-    tipo_hunt = st.selectbox("Tipo de Hunt", ["Todos", "Solo", "Corrupted", "HCE"])
+    tipo_filtro = st.selectbox("Tipo de Hunt", ["Todos", "Solo", "Corrupted", "HCE"])
     data_inicio, data_fim = st.date_input(
         "Intervalo de Data",
         value=(datetime.now().date() - pd.Timedelta(days=30), datetime.now().date()),
@@ -85,20 +97,25 @@ with st.expander("Adicionar Nova Hunt", expanded=True):
             st.success("Hunt registrada com sucesso!")
             st.balloons()
 
+perfil.marcar("formularios")
+
 # Exibir dados
 st.subheader("Histórico de Hunts")
-dados = carregar_dados()
 
-# Aplicar filtros
-if personagem_filtro != "Todos":
-    dados = dados[dados['personagem'] == personagem_filtro]
-if tipo_hunt != "Todos":
-    dados = dados[dados['tipo_hunt'] == tipo_hunt]
+# Filtros aplicados sobre a cópia em memória do histórico (dataset_historico)
+filtros = {
+    'personagem': personagem_filtro if personagem_filtro != "Todos" else None,
+    'tipo_hunt': tipo_filtro if tipo_filtro != "Todos" else None,
+    'data_inicio': data_inicio,
+    'data_fim': data_fim,
+}
 
-# Aplicar filtro de data
-dados['data'] = pd.to_datetime(dados['data'], format='%d/%m/%Y')
-dados = dados[(dados['data'].dt.date >= data_inicio) & (dados['data'].dt.date <= data_fim)]
-dados['data'] = dados['data'].dt.strftime('%d/%m/%Y')
+total_registros = contar_registros(filtros)
+total_paginas = max(1, -(-total_registros // TAMANHO_PAGINA))
+pagina = st.number_input(f"Página (de {total_paginas})", min_value=1, max_value=total_paginas, value=1, step=1)
+dados = carregar_dados(filtros, pagina)
+
+perfil.marcar("carregar")
 
 # Exibir dataframe
 st.dataframe(
@@ -106,7 +123,7 @@ st.dataframe(
     use_container_width=True,
     hide_index=True,
     column_config={
-        "data": "Data",
+        "data": st.column_config.DateColumn("Data", format="DD/MM/YYYY"),
         "personagem": "Personagem",
         "tipo_hunt": "Tipo",
         "lucro_itens": st.column_config.NumberColumn(
@@ -118,21 +135,32 @@ st.dataframe(
     }
 )
 
+perfil.marcar("tabela")
+
 # Análises
 st.subheader("Análise de Hunts")
 
-# Gráfico de lucro por tipo e personagem
-chart_data = dados.groupby(['personagem', 'tipo_hunt'])['lucro_itens'].sum().reset_index()
+# Gráfico de lucro por tipo e personagem, agregado no banco sobre todos os registros filtrados
+chart_data = resumir_hunts_solo(**filtros)
 # Criar um pivot table para melhor visualização
 chart_pivot = chart_data.pivot(index='tipo_hunt', columns='personagem', values='lucro_itens').fillna(0)
 
+perfil.marcar("agregar")
+
 # Exibir o gráfico usando o pivot table
 st.bar_chart(chart_pivot)
 
+perfil.marcar("grafico")
+
 # Métricas totais
+lucro_total = chart_data['lucro_itens'].sum()
+quantidade_hunts = chart_data['quantidade'].sum()
 col1, col2 = st.columns(2)
 with col1:
-    st.metric("Lucro Total", f"R$ {dados['lucro_itens'].sum():,.2f}")
+    st.metric("Lucro Total", f"R$ {lucro_total:,.2f}")
 with col2:
-    media_lucro = dados['lucro_itens'].mean()
+    media_lucro = lucro_total / quantidade_hunts if quantidade_hunts else 0
     st.metric("Média de Lucro por Hunt", f"R$ {media_lucro:,.2f}")
+
+perfil.marcar("metricas")
+perfil.exibir()
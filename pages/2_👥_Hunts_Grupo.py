@@ -1,38 +1,51 @@
 import streamlit as st
 import pandas as pd
 from datetime import datetime
-from database import get_db_connection, init_db
+from database import (
+    get_db_connection,
+    resumir_hunts_grupo, medias_hunts_grupo_por_personagem, inserir_hunt_grupo
+)
 from config import get_personagens
+from cache import invalidar
+from dataset import dataset_historico
+from escrita import fila_escrita
+from perfil import iniciar_perfil
+from sessao import iniciar_sessao
 
 st.set_page_config(page_title="Hunts em Grupo", page_icon="👥", layout='wide')
 
-# Inicializar banco de dados
-init_db()
+# Tempos das fases desta renderização (com ?perfil=1 ou ALBION_PERFIL=1)
+perfil = iniciar_perfil("Hunts Grupo")
+
+# Banco da guilda da sessão (schema inicializado uma vez por processo e banco)
+iniciar_sessao()
+perfil.marcar("inicializar_db")
 
-# Função para carregar os dados do banco
-def carregar_dados():
+# Registros exibidos por página no histórico
+TAMANHO_PAGINA = 50
+
+# Função para carregar uma página do histórico, a partir do dataset compartilhado entre sessões
+def carregar_dados(filtros, pagina=1):
     try:
-        with get_db_connection() as conn:
-            query = "SELECT * FROM hunts_grupo ORDER BY data DESC"
-            df = pd.read_sql_query(query, conn)
-            # Converter a coluna de data para datetime e depois para o formato brasileiro
-            df['data'] = pd.to_datetime(df['data']).dt.strftime('%d/%m/%Y')
-            return df
+        # A data vem como datetime64; o formato brasileiro é aplicado só na exibição
+        return dataset_historico.consultar('hunts_grupo', limite=TAMANHO_PAGINA, deslocamento=(pagina - 1) * TAMANHO_PAGINA, **filtros)
     except Exception as e:
         st.error(f"Erro ao carregar dados: {str(e)}")
-        return pd.DataFrame(columns=['id', 'data', 'personagens', 'valor_total', 'observacoes'])
+        return pd.DataFrame(columns=['id', 'data', 'personagens', 'valor_total', 'observacoes', 'num_participantes'])
+
+# Função para contar os registros filtrados, para a paginação
+def contar_registros(filtros):
+    try:
+        return dataset_historico.contar('hunts_grupo', **filtros)
+    except Exception as e:
+        st.error(f"Erro ao contar registros: {str(e)}")
+        return 0
 
 # Função para salvar hunt no banco
 def salvar_hunt(data, personagens, valor_total, observacoes):
     try:
-        with get_db_connection() as conn:
-            cursor = conn.cursor()
-            personagens_str = ", ".join(personagens)
-            cursor.execute("""
-                INSERT INTO hunts_grupo (data, personagens, valor_total, observacoes)
-                VALUES (?, ?, ?, ?)
-            """, (data.strftime('%Y-%m-%d'), personagens_str, valor_total, observacoes))
-            conn.commit()
+        # Gravado pela fila de escrita em um commit agrupado com as outras sessões
+        fila_escrita.gravar('hunts_grupo', inserir_hunt_grupo, data, personagens, valor_total, observacoes)
         return True
     except Exception as e:
         st.error(f"Erro ao salvar dados: {str(e)}")
@@ -45,6 +58,7 @@ def deletar_hunt(id):
             cursor = conn.cursor()
             cursor.execute("DELETE FROM hunts_grupo WHERE id = ?", (id,))
             conn.commit()
+        invalidar('hunts_grupo')
         return True
     except Exception as e:
         st.error(f"Erro ao deletar registro: {str(e)}")
@@ -68,10 +82,11 @@ with st.expander("Adicionar Nova Hunt em Grupo", expanded=True):
     with col1:
         data = st.date_input("Data da Hunt")
         # Seleção múltipla de personagens
+        opcoes_personagens = get_personagens()
         personagens = st.multiselect(
             "Selecione os Personagens",
-            options=get_personagens(),
-            default=[get_personagens()[0]]  # Seleciona o primeiro personagem por padrão
+            options=opcoes_personagens,
+            default=opcoes_personagens[:1]  # Seleciona o primeiro personagem por padrão, se houver
         )
     with col2:
         valor_total = st.number_input("Valor Total da Hunt", min_value=0, step=1000)
@@ -86,25 +101,27 @@ with st.expander("Adicionar Nova Hunt em Grupo", expanded=True):
         else:
             st.error("Selecione pelo menos um personagem!")
 
+perfil.marcar("formularios")
+
 # Exibir dados
 st.subheader("Histórico de Hunts em Grupo")
-dados = carregar_dados()
 
-# Aplicar filtros
-# Filtro por número de participantes
-dados['num_participantes'] = dados['personagens'].str.count(',') + 1
-dados = dados[
-    (dados['num_participantes'] >= tamanho_grupo[0]) & 
-    (dados['num_participantes'] <= tamanho_grupo[1])
-]
+# Filtros aplicados sobre a cópia em memória do histórico (dataset_historico)
+filtros = {
+    'tamanho_grupo': tamanho_grupo,
+    'data_inicio': data_inicio,
+    'data_fim': data_fim,
+}
+
+total_registros = contar_registros(filtros)
+total_paginas = max(1, -(-total_registros // TAMANHO_PAGINA))
+pagina = st.number_input(f"Página (de {total_paginas})", min_value=1, max_value=total_paginas, value=1, step=1)
+dados = carregar_dados(filtros, pagina)
 
-# Aplicar filtro de data
-dados['data'] = pd.to_datetime(dados['data'], format='%d/%m/%Y')
-dados = dados[(dados['data'].dt.date >= data_inicio) & (dados['data'].dt.date <= data_fim)]
-dados['data'] = dados['data'].dt.strftime('%d/%m/%Y')
+perfil.marcar("carregar")
 
 # Calcular valor por pessoa
-dados['valor_por_pessoa'] = dados['valor_total'] / dados['num_participantes']
+dados = dados.assign(valor_por_pessoa=dados['valor_total'] / dados['num_participantes'])
 
 # Exibir dataframe
 st.dataframe(
@@ -112,7 +129,7 @@ st.dataframe(
     use_container_width=True,
     hide_index=True,
     column_config={
-        "data": "Data",
+        "data": st.column_config.DateColumn("Data", format="DD/MM/YYYY"),
         "personagens": "Personagens",
         "valor_total": st.column_config.NumberColumn(
             "Valor Total",
@@ -128,33 +145,28 @@ st.dataframe(
     }
 )
 
+perfil.marcar("tabela")
+
 # Análises
 st.subheader("Análise de Hunts em Grupo")
 
-# Métricas totais
+# Métricas totais, agregadas no banco sobre todos os registros filtrados
+resumo = resumir_hunts_grupo(**filtros)
 col1, col2, col3 = st.columns(3)
 with col1:
-    st.metric("Média de Participantes", f"{dados['num_participantes'].mean():.1f}")
+    st.metric("Média de Participantes", f"{resumo['media_participantes']:.1f}")
 with col2:
-    st.metric("Valor Total Acumulado", f"R$ {dados['valor_total'].sum():,.2f}")
+    st.metric("Valor Total Acumulado", f"R$ {resumo['valor_total']:,.2f}")
 with col3:
-    st.metric("Média por Pessoa", f"R$ {dados['valor_por_pessoa'].mean():,.2f}")
+    st.metric("Média por Pessoa", f"R$ {resumo['media_por_pessoa']:,.2f}")
 
 # Após as métricas existentes, adicionar análise por personagem
 st.subheader("Análise por Personagem")
 
 # Calcular média por personagem
-medias_personagem = []
-for personagem in get_personagens():
-    # Filtrar hunts que incluem o personagem
-    hunts_personagem = dados[dados['personagens'].str.contains(personagem, case=False, na=False)]
-    if not hunts_personagem.empty:
-        media = hunts_personagem['valor_por_pessoa'].mean()
-        medias_personagem.append({
-            'personagem': personagem,
-            'media': media,
-            'participacoes': len(hunts_personagem)
-        })
+medias_personagem = medias_hunts_grupo_por_personagem(get_personagens(), **filtros).to_dict('records')
+
+perfil.marcar("agregar")
 
 # Criar 6 colunas para os cards
 cols = st.columns(7)
@@ -207,3 +219,6 @@ for idx, dados_personagem in enumerate(medias_personagem):
             </div>
         </div>
         """, unsafe_allow_html=True)
+
+perfil.marcar("cards")
+perfil.exibir()
@@ -2,37 +2,35 @@ import streamlit as st
 import pandas as pd
 from datetime import datetime
 import os
-from database import get_db_connection, init_db
+from database import get_db_connection, resumir_mortes, inserir_morte
 from config import get_personagens
+from cache import invalidar
+from escrita import fila_escrita
+from perfil import iniciar_perfil
+from sessao import iniciar_sessao
 
 st.set_page_config(page_title="Registro de Mortes!", page_icon="💀", layout='wide')
 
-# Inicializar banco de dados
-init_db()
+# Tempos das fases desta renderização (com ?perfil=1 ou ALBION_PERFIL=1)
+perfil = iniciar_perfil("Mortes")
 
-# Função para carregar os dados do banco
+# Banco da guilda da sessão (schema inicializado uma vez por processo e banco)
+iniciar_sessao()
+perfil.marcar("inicializar_db")
+
+# Função para carregar as mortes agregadas por personagem direto do banco
 def carregar_dados():
     try:
-        with get_db_connection() as conn:
-            query = "SELECT * FROM mortes ORDER BY data DESC"
-            df = pd.read_sql_query(query, conn)
-            # Converter a coluna de data para datetime e depois para o formato brasileiro
-            df['data'] = pd.to_datetime(df['data']).dt.strftime('%d/%m/%Y')
-            return df
+        return resumir_mortes()
     except Exception as e:
         st.error(f"Erro ao carregar dados: {str(e)}")
-        return pd.DataFrame(columns=['id', 'data', 'personagem', 'valor_perdido', 'descricao'])
+        return pd.DataFrame(columns=['personagem', 'mortes', 'valor_perdido'])
 
 # Função para salvar morte no banco
 def salvar_morte(personagem, data, valor_perdido, descricao):
     try:
-        with get_db_connection() as conn:
-            cursor = conn.cursor()
-            cursor.execute("""
-                INSERT INTO mortes (data, personagem, valor_perdido, descricao)
-                VALUES (?, ?, ?, ?)
-            """, (data.strftime('%Y-%m-%d'), personagem, valor_perdido, descricao))
-            conn.commit()
+        # Gravado pela fila de escrita em um commit agrupado com as outras sessões
+        fila_escrita.gravar('mortes', inserir_morte, data, personagem, valor_perdido, descricao)
         return True
     except Exception as e:
         st.error(f"Erro ao salvar dados: {str(e)}")
@@ -45,6 +43,7 @@ def deletar_morte(id):
             cursor = conn.cursor()
             cursor.execute("DELETE FROM mortes WHERE id = ?", (id,))
             conn.commit()
+        invalidar('mortes')
         return True
     except Exception as e:
         st.error(f"Erro ao deletar registro: {str(e)}")
@@ -136,11 +135,14 @@ def formatar_valor(valor):
         return f"{valor/1000:.1f}K"
     return f"{valor:.0f}"
 
-# Preparar dados para os rankings
+perfil.marcar("formularios")
+
+# Preparar dados para os rankings (uma linha por personagem)
 dados = carregar_dados()
-ranking_mortes = dados['personagem'].value_counts().reset_index()
+perfil.marcar("carregar")
+ranking_mortes = dados.sort_values('mortes', ascending=False).head(10)  # Limitar para top 10
+ranking_mortes = ranking_mortes[['personagem', 'mortes']].reset_index(drop=True)
 ranking_mortes.columns = ['Personagem', 'Quantidade de Mortes']
-ranking_mortes = ranking_mortes.head(10)  # Limitar para top 10
 
 # Adicionar mensagem de parabéns para quem mais morreu
 if not ranking_mortes.empty:
@@ -167,11 +169,13 @@ if not ranking_mortes.empty:
     """, unsafe_allow_html=True)
     st.balloons()
 
-ranking_valores = dados.groupby('personagem')['valor_perdido'].sum().reset_index()
-ranking_valores = ranking_valores.sort_values('valor_perdido', ascending=False)
+ranking_valores = dados.sort_values('valor_perdido', ascending=False)
 ranking_valores = ranking_valores.head(10)  # Limitar para top 10
+ranking_valores = ranking_valores[['personagem', 'valor_perdido']].reset_index(drop=True)
 ranking_valores.columns = ['Personagem', 'Valor Total Perdido']
 
+perfil.marcar("agregar")
+
 # Criar duas colunas para os rankings
 col1, col2 = st.columns(2)
 
@@ -204,11 +208,13 @@ with col2:
         </div>
         """, unsafe_allow_html=True)
 
+perfil.marcar("cards")
+
 # Análise de Perdas por Personagem
 st.subheader("Análise de Perdas por Personagem")
 
 # Preparar dados para o gráfico
-chart_data = dados.groupby('personagem')['valor_perdido'].sum().reset_index()
+chart_data = dados[['personagem', 'valor_perdido']]
 
 # Criar gráfico de barras
 st.bar_chart(
@@ -220,4 +226,7 @@ st.bar_chart(
 
 # Mostrar total de perdas no período
 total_perdas = dados['valor_perdido'].sum()
-st.metric("Total de Perdas no Período", formatar_valor(total_perdas)) 
\ No newline at end of file
+st.metric("Total de Perdas no Período", formatar_valor(total_perdas))
+
+perfil.marcar("grafico")
+perfil.exibir()
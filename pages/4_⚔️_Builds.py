@@ -1,41 +1,26 @@
 import streamlit as st
 import pandas as pd
 from datetime import datetime
-from database import get_db_connection, init_db, upgrade_db
-from config import get_personagens, get_equipamentos
+from database import get_db_connection, listar_builds
+from config import get_indice_personagem, get_personagens, get_item_nome, catalogo_equipamentos
+from builds import html_build
+from cache import invalidar
+from perfil import iniciar_perfil
+from sessao import iniciar_sessao
 
 st.set_page_config(page_title="Builds", page_icon="⚔️", layout="wide")
 
-# Inicializar e atualizar banco de dados
-init_db()
-upgrade_db()
+# Tempos das fases desta renderização (com ?perfil=1 ou ALBION_PERFIL=1)
+perfil = iniciar_perfil("Builds")
 
-# Adicionar constante para a URL base
-ALBION_RENDER_URL = "https://render.albiononline.com/v1/item/"
-
-# Função para converter nome do item para ID do Albion
-def get_item_id(item_name):
-    if not item_name:  # Se o item estiver vazio
-        return None
-        
-    # Procurar o item em todas as categorias
-    categorias = ['armas', 'cabecas', 'armaduras', 'botas', 'capas', 'pocoes', 'comidas', 'secundaria']
-    
-    for categoria in categorias:
-        items = get_equipamentos(categoria)
-        if isinstance(items, list):
-            for item in items:
-                if isinstance(item, dict) and item.get('name') == item_name:
-                    return item.get('id')
-    
-    return None
+# Banco da guilda da sessão (schema inicializado uma vez por processo e banco)
+iniciar_sessao()
+perfil.marcar("inicializar_db")
 
 # Funções do banco de dados
-def carregar_builds():
+def carregar_builds(tipo=None, personagem=None):
     try:
-        with get_db_connection() as conn:
-            query = "SELECT * FROM builds ORDER BY tipo, nome"
-            return pd.read_sql_query(query, conn)
+        return listar_builds(tipo, personagem)
     except Exception as e:
         st.error(f"Erro ao carregar builds: {str(e)}")
         return pd.DataFrame()
@@ -45,10 +30,11 @@ def salvar_build(nome, tipo, arma, cabeca, peito, botas, capa, potion, food, not
         with get_db_connection() as conn:
             cursor = conn.cursor()
             cursor.execute("""
-                INSERT INTO builds (nome, tipo, arma, cabeca, peito, botas, capa, potion, food, notas, personagem, secundaria)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                INSERT INTO builds (nome, tipo, arma, cabeca, peito, botas, capa, potion, food, notas, personagem, secundaria, updated_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, CURRENT_TIMESTAMP)
             """, (nome, tipo, arma, cabeca, peito, botas, capa, potion, food, notas, personagem, secundaria))
             conn.commit()
+        invalidar('builds')
         return True
     except Exception as e:
         st.error(f"Erro ao salvar build: {str(e)}")
@@ -60,10 +46,11 @@ def atualizar_build(id, nome, tipo, arma, cabeca, peito, botas, capa, potion, fo
             cursor = conn.cursor()
             cursor.execute("""
                 UPDATE builds 
-                SET nome=?, tipo=?, arma=?, cabeca=?, peito=?, botas=?, capa=?, potion=?, food=?, notas=?, personagem=?, secundaria=?
+                SET nome=?, tipo=?, arma=?, cabeca=?, peito=?, botas=?, capa=?, potion=?, food=?, notas=?, personagem=?, secundaria=?, updated_at=CURRENT_TIMESTAMP
                 WHERE id=?
             """, (nome, tipo, arma, cabeca, peito, botas, capa, potion, food, notas, personagem, secundaria, id))
             conn.commit()
+        invalidar('builds')
         return True
     except Exception as e:
         st.error(f"Erro ao atualizar build: {str(e)}")
@@ -75,6 +62,7 @@ def deletar_build(id):
             cursor = conn.cursor()
             cursor.execute("DELETE FROM builds WHERE id=?", (id,))
             conn.commit()
+        invalidar('builds')
         return True
     except Exception as e:
         st.error(f"Erro ao deletar build: {str(e)}")
@@ -169,11 +157,23 @@ with st.sidebar:
     )
     personagem_filtro = st.selectbox(
         "Personagem",
-        options=["Todos"] + get_personagens()
+        options=["Todos", *get_personagens()]
     )
 
 st.title("Builds ⚔️")
 
+def selecionar_equipamento(rotulo, categoria, key, vazio="", atual=None):
+    """Selectbox com os equipamentos de uma categoria; retorna o ID escolhido ('' se nenhum)"""
+    # Opções montadas uma vez na carga do catálogo e compartilhadas pelos dois formulários
+    opcoes = catalogo_equipamentos.get_opcoes(categoria)
+    return st.selectbox(
+        rotulo,
+        options=opcoes.ids,
+        index=opcoes.indices.get(atual or '', 0),
+        format_func=lambda item_id: opcoes.nomes.get(item_id) or vazio,
+        key=key
+    )
+
 # Área para adicionar nova build
 with st.expander("Adicionar Nova Build", expanded=False):
     col1, col2 = st.columns(2)
@@ -190,109 +190,54 @@ with st.expander("Adicionar Nova Build", expanded=False):
         )
     
     with col2:
-        armas = get_equipamentos("armas")
-        arma = st.selectbox(
-            "Arma Principal",
-            options=[{"name": "", "id": ""}] + armas,
-            format_func=lambda x: "Selecione uma arma" if not x or x.get("name") == "" else x.get("name"),
-            key="arma"
-        )
-        secundarias = get_equipamentos("secundaria")
-        secundaria = st.selectbox(
-            "Mão Secundária",
-            options=[{"name": "", "id": ""}] + secundarias,
-            format_func=lambda x: "Selecione item secundário" if not x or x.get("name") == "" else x.get("name"),
-            key="secundaria"
-        )
-        cabecas = get_equipamentos("cabecas")
-        cabeca = st.selectbox(
-            "Cabeça",
-            options=[{"name": "", "id": ""}] + cabecas,
-            format_func=lambda x: "Selecione um capacete" if not x or x.get("name") == "" else x.get("name"),
-            key="cabeca"
-        )
-        armaduras = get_equipamentos("armaduras")
-        peito = st.selectbox(
-            "Armadura",
-            options=[{"name": "", "id": ""}] + armaduras,
-            format_func=lambda x: "Selecione uma armadura" if not x or x.get("name") == "" else x.get("name"),
-            key="peito"
-        )
-        botas_list = get_equipamentos("botas")
-        botas = st.selectbox(
-            "Botas",
-            options=[{"name": "", "id": ""}] + botas_list,
-            format_func=lambda x: "Selecione uma bota" if not x or x.get("name") == "" else x.get("name"),
-            key="botas"
-        )
+        arma = selecionar_equipamento("Arma Principal", "armas", "arma", "Selecione uma arma")
+        secundaria = selecionar_equipamento("Mão Secundária", "secundaria", "secundaria", "Selecione item secundário")
+        cabeca = selecionar_equipamento("Cabeça", "cabecas", "cabeca", "Selecione um capacete")
+        peito = selecionar_equipamento("Armadura", "armaduras", "peito", "Selecione uma armadura")
+        botas = selecionar_equipamento("Botas", "botas", "botas", "Selecione uma bota")
     
     col3, col4 = st.columns(2)
     with col3:
-        capas = get_equipamentos("capas")
-        capa = st.selectbox(
-            "Capa",
-            options=[{"name": "", "id": ""}] + capas,
-            format_func=lambda x: "Selecione uma capa" if x["name"] == "" else x["name"],
-            key="capa"
-        )
-        pocoes = get_equipamentos("pocoes")
-        potion = st.selectbox(
-            "Poção",
-            options=[{"name": "", "id": ""}] + pocoes,
-            format_func=lambda x: "Selecione uma poção" if x["name"] == "" else x["name"],
-            key="potion"
-        )
+        capa = selecionar_equipamento("Capa", "capas", "capa", "Selecione uma capa")
+        potion = selecionar_equipamento("Poção", "pocoes", "potion", "Selecione uma poção")
     with col4:
-        comidas = get_equipamentos("comidas")
-        food = st.selectbox(
-            "Comida",
-            options=[{"name": "", "id": ""}] + comidas,
-            format_func=lambda x: "Selecione uma comida" if x["name"] == "" else x["name"],
-            key="food"
-        )
+        food = selecionar_equipamento("Comida", "comidas", "food", "Selecione uma comida")
     
     notas = st.text_area("Notas/Observações")
     
     if st.button("Salvar Build"):
-        if nome and arma["name"]:  # Validação básica
+        if nome and arma:  # Validação básica
             if salvar_build(
                 nome, 
                 tipo, 
-                arma["name"], 
-                cabeca["name"], 
-                peito["name"], 
-                botas["name"], 
-                capa["name"], 
-                potion["name"], 
-                food["name"], 
+                arma, 
+                cabeca, 
+                peito, 
+                botas, 
+                capa, 
+                potion, 
+                food, 
                 notas, 
                 personagem, 
-                secundaria["name"]
+                secundaria
             ):
                 st.success("Build salva com sucesso!")
                 st.balloons()
         else:
             st.error("Nome da build e arma principal são obrigatórios!")
 
+perfil.marcar("formularios")
+
 # Exibir builds
 st.subheader("Builds Salvas")
 
-builds = carregar_builds()
+# Filtros aplicados direto na consulta
+builds = carregar_builds(
+    tipo_filtro if tipo_filtro != "Todos" else None,
+    personagem_filtro if personagem_filtro != "Todos" else None
+)
 
-# Aplicar filtros
-if tipo_filtro != "Todos":
-    builds = builds[builds['tipo'] == tipo_filtro]
-if personagem_filtro != "Todos":
-    builds = builds[builds['personagem'] == personagem_filtro]
-
-# Mover a função para antes da seção de edição
-def encontrar_indice_item(items, nome_item):
-    if not nome_item:
-        return 0
-    for i, item in enumerate(items):
-        if item.get('name') == nome_item:
-            return i + 1  # +1 porque temos um item vazio no início
-    return 0
+perfil.marcar("carregar")
 
 # Adicionar lógica de edição no topo do arquivo, após as importações:
 if 'editing_build' in st.session_state:
@@ -309,83 +254,43 @@ if 'editing_build' in st.session_state:
             key="edit_tipo")
         personagem = st.selectbox("Personagem Principal", 
             get_personagens(),
-            index=get_personagens().index(build['personagem']),
+            index=get_indice_personagem(build['personagem']),
             key="edit_personagem")
     
     with col2:
-        armas = get_equipamentos("armas")
-        arma = st.selectbox("Arma Principal", 
-            options=[{"name": "", "id": ""}] + armas,
-            index=encontrar_indice_item(armas, build['arma']),
-            format_func=lambda x: x.get("name"),
-            key="edit_arma")
-        secundarias = get_equipamentos("secundaria")
-        secundaria = st.selectbox("Mão Secundária",
-            options=[{"name": "", "id": ""}] + secundarias,
-            index=encontrar_indice_item(secundarias, build['secundaria']),
-            format_func=lambda x: x.get("name"),
-            key="edit_secundaria")
-        cabecas = get_equipamentos("cabecas")
-        cabeca = st.selectbox("Cabeça",
-            options=[{"name": "", "id": ""}] + cabecas,
-            index=encontrar_indice_item(cabecas, build['cabeca']),
-            format_func=lambda x: x.get("name"),
-            key="edit_cabeca")
-        armaduras = get_equipamentos("armaduras")
-        peito = st.selectbox("Armadura",
-            options=[{"name": "", "id": ""}] + armaduras,
-            index=encontrar_indice_item(armaduras, build['peito']),
-            format_func=lambda x: x.get("name"),
-            key="edit_peito")
-        botas_list = get_equipamentos("botas")
-        botas = st.selectbox("Botas",
-            options=[{"name": "", "id": ""}] + botas_list,
-            index=encontrar_indice_item(botas_list, build['botas']),
-            format_func=lambda x: x.get("name"),
-            key="edit_botas")
+        arma = selecionar_equipamento("Arma Principal", "armas", "edit_arma", atual=build['arma'])
+        secundaria = selecionar_equipamento("Mão Secundária", "secundaria", "edit_secundaria", atual=build['secundaria'])
+        cabeca = selecionar_equipamento("Cabeça", "cabecas", "edit_cabeca", atual=build['cabeca'])
+        peito = selecionar_equipamento("Armadura", "armaduras", "edit_peito", atual=build['peito'])
+        botas = selecionar_equipamento("Botas", "botas", "edit_botas", atual=build['botas'])
     
     col3, col4 = st.columns(2)
     with col3:
-        capas = get_equipamentos("capas")
-        capa = st.selectbox("Capa",
-            options=[{"name": "", "id": ""}] + capas,
-            index=encontrar_indice_item(capas, build['capa']),
-            format_func=lambda x: x.get("name"),
-            key="edit_capa")
-        pocoes = get_equipamentos("pocoes")
-        potion = st.selectbox("Poção",
-            options=[{"name": "", "id": ""}] + pocoes,
-            index=encontrar_indice_item(pocoes, build['potion']),
-            format_func=lambda x: x.get("name"),
-            key="edit_potion")
+        capa = selecionar_equipamento("Capa", "capas", "edit_capa", atual=build['capa'])
+        potion = selecionar_equipamento("Poção", "pocoes", "edit_potion", atual=build['potion'])
     with col4:
-        comidas = get_equipamentos("comidas")
-        food = st.selectbox("Comida",
-            options=[{"name": "", "id": ""}] + comidas,
-            index=encontrar_indice_item(comidas, build['food']),
-            format_func=lambda x: x.get("name"),
-            key="edit_food")
+        food = selecionar_equipamento("Comida", "comidas", "edit_food", atual=build['food'])
     
     notas = st.text_area("Notas/Observações", value=build['notas'], key="edit_notas")
     
     col5, col6 = st.columns(2)
     with col5:
         if st.button("Salvar Alterações"):
-            if nome and arma.get("name"):
+            if nome and arma:
                 if atualizar_build(
                     build['id'], 
                     nome, 
                     tipo, 
-                    arma.get("name", ""),
-                    cabeca.get("name", ""),
-                    peito.get("name", ""),
-                    botas.get("name", ""),
-                    capa.get("name", ""),
-                    potion.get("name", ""),
-                    food.get("name", ""),
+                    arma,
+                    cabeca,
+                    peito,
+                    botas,
+                    capa,
+                    potion,
+                    food,
                     notas,
                     personagem,
-                    secundaria.get("name", "")
+                    secundaria
                 ):
                     st.success("Build atualizada com sucesso!")
                     del st.session_state.editing_build
@@ -395,54 +300,40 @@ if 'editing_build' in st.session_state:
             del st.session_state.editing_build
             st.rerun()
 
-# Exibir builds em dropdowns
-for _, build in builds.iterrows():
-    with st.expander(f"📋 {build['nome']} - {build['tipo']} ({build['personagem']})", expanded=False):
+perfil.marcar("edicao")
+
+# Builds exibidas por página
+TAMANHO_PAGINA_BUILDS = 20
+
+total_paginas = max(1, -(-len(builds) // TAMANHO_PAGINA_BUILDS))
+pagina = st.number_input(f"Página (de {total_paginas})", min_value=1, max_value=total_paginas, value=1, step=1)
+pagina_builds = builds.iloc[(pagina - 1) * TAMANHO_PAGINA_BUILDS:pagina * TAMANHO_PAGINA_BUILDS]
+
+perfil.marcar("filtrar")
+
+# Ids das builds abertas; só elas montam a grade de equipamentos e os botões
+if 'builds_abertas' not in st.session_state:
+    st.session_state.builds_abertas = set()
+
+# Exibir builds: resumo de uma linha e detalhes apenas das abertas
+for build in pagina_builds.to_dict('records'):
+    aberta = build['id'] in st.session_state.builds_abertas
+    col_titulo, col_abrir = st.columns([0.85, 0.15])
+    with col_titulo:
+        st.markdown(f"📋 **{build['nome']}** - {build['tipo']} ({build['personagem']})")
+    with col_abrir:
+        if st.button("🔼 Fechar" if aberta else "🔽 Abrir", key=f"abrir_{build['id']}"):
+            st.session_state.builds_abertas ^= {build['id']}
+            st.rerun()
+
+    if not aberta:
+        continue
+
+    with st.container():
         col1, col2, col3 = st.columns([0.6, 0.25, 0.15])
         
         with col1:
-            st.markdown(f"""
-            <div class="build-card">
-                <div class="equipment-section">
-                    <div class="equipment-item">
-                        <img class="equipment-img" src="{ALBION_RENDER_URL + 'T8_BAG@4' + '.png'}">
-                        <div class="tooltip-trigger" title="Mochila"></div>
-                    </div>
-                    <div class="equipment-item">
-                        <img class="equipment-img" src="{ALBION_RENDER_URL + (get_item_id(build['cabeca']) or '') + '.png'}" alt="{build['cabeca'] or 'Nenhuma'}">
-                        <div class="tooltip-trigger" title="{build['cabeca'] or 'Nenhuma'}"></div>
-                    </div>
-                    <div class="equipment-item">
-                        <img class="equipment-img" src="{ALBION_RENDER_URL + (get_item_id(build['capa']) or '') + '.png'}" alt="{build['capa'] or 'Nenhuma'}">
-                        <div class="tooltip-trigger" title="{build['capa'] or 'Nenhuma'}"></div>
-                    </div>
-                    <div class="equipment-item">
-                        <img class="equipment-img" src="{ALBION_RENDER_URL + (get_item_id(build['arma']) or '') + '.png'}" alt="{build['arma'] or 'Nenhuma'}">
-                        <div class="tooltip-trigger" title="{build['arma'] or 'Nenhuma'}"></div>
-                    </div>
-                    <div class="equipment-item">
-                        <img class="equipment-img" src="{ALBION_RENDER_URL + (get_item_id(build['peito']) or '') + '.png'}" alt="{build['peito'] or 'Nenhuma'}">
-                        <div class="tooltip-trigger" title="{build['peito'] or 'Nenhuma'}"></div>
-                    </div>
-                    <div class="equipment-item">
-                        <img class="equipment-img" src="{ALBION_RENDER_URL + (get_item_id(build['secundaria'] or build['arma']) or '') + '.png'}" alt="{build['secundaria'] or build['arma'] or 'Nenhuma'}">
-                        <div class="tooltip-trigger" title="{build['secundaria'] or build['arma'] or 'Nenhuma'}"></div>
-                    </div>
-                    <div class="equipment-item">
-                        <img class="equipment-img" src="{ALBION_RENDER_URL + (get_item_id(build['potion']) or '') + '.png'}" alt="{build['potion'] or 'Nenhuma'}">
-                        <div class="tooltip-trigger" title="{build['potion'] or 'Nenhuma'}"></div>
-                    </div>
-                    <div class="equipment-item">
-                        <img class="equipment-img" src="{ALBION_RENDER_URL + (get_item_id(build['botas']) or '') + '.png'}" alt="{build['botas'] or 'Nenhuma'}">
-                        <div class="tooltip-trigger" title="{build['botas'] or 'Nenhuma'}"></div>
-                    </div>
-                    <div class="equipment-item">
-                        <img class="equipment-img" src="{ALBION_RENDER_URL + (get_item_id(build['food']) or '') + '.png'}" alt="{build['food'] or 'Nenhuma'}">
-                        <div class="tooltip-trigger" title="{build['food'] or 'Nenhuma'}"></div>
-                    </div>
-                </div>
-            </div>
-            """, unsafe_allow_html=True)
+            st.markdown(html_build(build), unsafe_allow_html=True)
             
             if build['notas']:  # Só mostra o tooltip se houver notas
                 st.markdown("ℹ️ Passe o mouse aqui para ver as notas" + " " * 100, help=build['notas'])
@@ -450,17 +341,17 @@ for _, build in builds.iterrows():
         with col2:
             # Lista de equipamentos
             st.markdown("**Equipamentos:**")
-            if build['arma']: st.markdown(f"🗡️ {build['arma']}")
+            if build['arma']: st.markdown(f"🗡️ {get_item_nome(build['arma'])}")
             if build['secundaria']: 
-                st.markdown(f"🛡️ {build['secundaria']}")
+                st.markdown(f"🛡️ {get_item_nome(build['secundaria'])}")
             elif build['arma']:
-                st.markdown(f"🛡️ {build['arma']} (Duas mãos)")
-            if build['cabeca']: st.markdown(f"⛑️ {build['cabeca']}")
-            if build['peito']: st.markdown(f"👕 {build['peito']}")
-            if build['botas']: st.markdown(f"👢 {build['botas']}")
-            if build['capa']: st.markdown(f"🧥 {build['capa']}")
-            if build['potion']: st.markdown(f"🧪 {build['potion']}")
-            if build['food']: st.markdown(f"🍖 {build['food']}")
+                st.markdown(f"🛡️ {get_item_nome(build['arma'])} (Duas mãos)")
+            if build['cabeca']: st.markdown(f"⛑️ {get_item_nome(build['cabeca'])}")
+            if build['peito']: st.markdown(f"👕 {get_item_nome(build['peito'])}")
+            if build['botas']: st.markdown(f"👢 {get_item_nome(build['botas'])}")
+            if build['capa']: st.markdown(f"🧥 {get_item_nome(build['capa'])}")
+            if build['potion']: st.markdown(f"🧪 {get_item_nome(build['potion'])}")
+            if build['food']: st.markdown(f"🍖 {get_item_nome(build['food'])}")
 
         with col3:
             if st.button("✏️ Editar", key=f"edit_{build['id']}"):
@@ -470,4 +361,7 @@ for _, build in builds.iterrows():
             if st.button("🗑️ Deletar", key=f"delete_{build['id']}"):
                 if deletar_build(build['id']):
                     st.success("Build deletada com sucesso!")
-                    st.rerun() 
\ No newline at end of file
+                    st.rerun()
+
+perfil.marcar("cards")
+perfil.exibir()
@@ -0,0 +1,125 @@
+import streamlit as st
+import pandas as pd
+from datetime import datetime
+from database import contar_lancamentos, ler_extrato, saldo_diario, saldo_por_personagem
+from config import get_personagens
+from perfil import iniciar_perfil
+from sessao import iniciar_sessao
+
+st.set_page_config(page_title="Saldo", page_icon="💰", layout='wide')
+
+# Tempos das fases desta renderização (com ?perfil=1 ou ALBION_PERFIL=1)
+perfil = iniciar_perfil("Saldo")
+
+# Banco da guilda da sessão (schema inicializado uma vez por processo e banco)
+iniciar_sessao()
+perfil.marcar("inicializar_db")
+
+# Lançamentos exibidos por página no extrato
+TAMANHO_PAGINA = 50
+
+ORIGENS = {'solo': "Hunt Solo", 'grupo': "Hunt em Grupo", 'morte': "Morte"}
+
+# Função para carregar uma página do extrato, com o saldo calculado no banco (função de janela)
+def carregar_extrato(filtros, pagina=1):
+    try:
+        return ler_extrato(limite=TAMANHO_PAGINA, deslocamento=(pagina - 1) * TAMANHO_PAGINA, **filtros)
+    except Exception as e:
+        st.error(f"Erro ao carregar extrato: {str(e)}")
+        return pd.DataFrame(columns=['data', 'personagem', 'origem', 'origem_id', 'valor', 'saldo'])
+
+# Sidebar
+with st.sidebar:
+    st.title("Filtros")
+    personagem_filtro = st.selectbox(
+        "Personagem",
+        options=["Todos", *get_personagens()]
+    )
+    data_inicio, data_fim = st.date_input(
+        "Intervalo de Data",
+        value=(datetime.now().date() - pd.Timedelta(days=30), datetime.now().date()),
+        key="date_range"
+    )
+
+st.title("Saldo Líquido 💰")
+st.caption("Lucro das hunts solo e das cotas das hunts em grupo menos o valor perdido em mortes.")
+
+# O saldo sempre considera todo o histórico; data_inicio só limita o que é exibido
+filtros = {
+    'personagem': personagem_filtro if personagem_filtro != "Todos" else None,
+    'data_inicio': data_inicio,
+    'data_fim': data_fim,
+}
+
+# Saldo de cada personagem até o fim do intervalo
+try:
+    saldos = saldo_por_personagem(data_fim=data_fim)
+except Exception as e:
+    st.error(f"Erro ao carregar saldos: {str(e)}")
+    saldos = pd.DataFrame(columns=['personagem', 'saldo', 'ganhos', 'perdas'])
+if filtros['personagem']:
+    saldos = saldos[saldos['personagem'] == filtros['personagem']]
+
+perfil.marcar("carregar_saldos")
+
+col1, col2, col3 = st.columns(3)
+with col1:
+    st.metric("Saldo", f"R$ {saldos['saldo'].sum():,.2f}")
+with col2:
+    st.metric("Ganhos", f"R$ {saldos['ganhos'].sum():,.2f}")
+with col3:
+    st.metric("Perdas", f"R$ {saldos['perdas'].sum():,.2f}")
+
+st.dataframe(
+    saldos,
+    use_container_width=True,
+    hide_index=True,
+    column_config={
+        "personagem": "Personagem",
+        "saldo": st.column_config.NumberColumn("Saldo", format="R$ %.2f"),
+        "ganhos": st.column_config.NumberColumn("Ganhos", format="R$ %.2f"),
+        "perdas": st.column_config.NumberColumn("Perdas", format="R$ %.2f"),
+    }
+)
+
+perfil.marcar("metricas")
+
+# Evolução do saldo: um ponto por dia com lançamentos, mantido nos dias sem atividade
+st.subheader("Evolução do Saldo")
+try:
+    diario = saldo_diario(**filtros)
+    if diario.empty:
+        st.info("Nenhum lançamento no intervalo.")
+    else:
+        grafico = diario.pivot(index='data', columns='personagem', values='saldo').dropna(axis=1, how='all').ffill()
+        st.line_chart(grafico)
+except Exception as e:
+    st.error(f"Erro ao carregar evolução do saldo: {str(e)}")
+
+perfil.marcar("grafico")
+
+# Extrato paginado, do lançamento mais recente para o mais antigo
+st.subheader("Extrato")
+
+total_registros = contar_lancamentos(**filtros)
+total_paginas = max(1, -(-total_registros // TAMANHO_PAGINA))
+pagina = st.number_input(f"Página (de {total_paginas})", min_value=1, max_value=total_paginas, value=1, step=1)
+dados = carregar_extrato(filtros, pagina)
+
+perfil.marcar("carregar_extrato")
+
+st.dataframe(
+    dados.drop('origem_id', axis=1).assign(origem=dados['origem'].map(ORIGENS)),
+    use_container_width=True,
+    hide_index=True,
+    column_config={
+        "data": st.column_config.DateColumn("Data", format="DD/MM/YYYY"),
+        "personagem": "Personagem",
+        "origem": "Origem",
+        "valor": st.column_config.NumberColumn("Valor", format="R$ %.2f"),
+        "saldo": st.column_config.NumberColumn("Saldo", format="R$ %.2f"),
+    }
+)
+
+perfil.marcar("tabela")
+perfil.exibir()
@@ -0,0 +1,57 @@
+import streamlit as st
+import pandas as pd
+import instrumentacao
+from sessao import iniciar_sessao
+
+st.set_page_config(page_title="Diagnóstico", page_icon="🩺", layout='wide')
+
+# Banco da guilda da sessão (schema inicializado uma vez por processo e banco)
+iniciar_sessao()
+
+st.title("Diagnóstico 🩺")
+
+# Página só tem conteúdo com a instrumentação ligada (ALBION_SQL_METRICAS=1)
+if not instrumentacao.ATIVA:
+    st.info("Instrumentação de consultas desativada. Inicie o app com ALBION_SQL_METRICAS=1 para ver as métricas.")
+    st.stop()
+
+st.caption(
+    f"Consultas acima de {instrumentacao.LIMITE_LENTA_MS:g} ms são gravadas em {instrumentacao.ARQUIVO_LENTAS}"
+    + (" com o plano de execução." if instrumentacao.CAPTURAR_PLANO else ".")
+)
+
+if st.button("Zerar estatísticas"):
+    instrumentacao.limpar()
+    st.rerun()
+
+# Estatísticas por comando, do pior p95 para o melhor
+st.subheader("Consultas por comando")
+estatisticas = pd.DataFrame(instrumentacao.resumo(), columns=[
+    'sql', 'paginas', 'execucoes', 'linhas', 'media_ms', 'p50_ms', 'p95_ms', 'max_ms'
+])
+st.dataframe(
+    estatisticas,
+    use_container_width=True,
+    hide_index=True,
+    column_config={
+        "sql": "SQL",
+        "paginas": "Páginas",
+        "execucoes": "Execuções",
+        "linhas": "Linhas",
+        "media_ms": st.column_config.NumberColumn("Média (ms)", format="%.2f"),
+        "p50_ms": st.column_config.NumberColumn("p50 (ms)", format="%.2f"),
+        "p95_ms": st.column_config.NumberColumn("p95 (ms)", format="%.2f"),
+        "max_ms": st.column_config.NumberColumn("Máximo (ms)", format="%.2f"),
+    }
+)
+
+# Últimas consultas lentas do log
+st.subheader("Consultas lentas recentes")
+lentas = instrumentacao.ler_lentas()
+if not lentas:
+    st.write("Nenhuma consulta lenta registrada.")
+for registro in lentas:
+    with st.expander(f"{registro['duracao_ms']:.1f} ms · {registro['pagina']} · {registro['quando']}"):
+        st.code(registro['sql'], language="sql")
+        if registro.get('plano'):
+            st.code("\n".join(registro['plano']))
@@ -0,0 +1,80 @@
+# Perfil opcional de cada renderização das páginas: tempo gasto em cada fase nomeada
+
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+
+import streamlit as st
+
+# Ligado para todas as páginas com ALBION_PERFIL=1, ou só na sessão que abrir a página com ?perfil=1
+ATIVO = os.environ.get("ALBION_PERFIL") == "1"
+
+# Se definido, cada renderização medida é acrescentada a este arquivo JSONL
+ARQUIVO_TRACE = os.environ.get("ALBION_PERFIL_ARQUIVO")
+
+_lock_arquivo = threading.Lock()
+
+class PerfilPagina:
+    """
+    Tempos das fases de uma renderização de página, em milissegundos.
+    marcar(fase) fecha a fase que terminou agora (desde a marcação anterior);
+    fase(nome) mede um bloco com `with`. Desativado, nenhum dos dois mede nada.
+    """
+
+    def __init__(self, pagina, ativo):
+        self.pagina = pagina
+        self.ativo = ativo
+        self.fases = []
+        self._inicio = self._ultimo = time.perf_counter()
+
+    def marcar(self, fase):
+        if not self.ativo:
+            return
+        agora = time.perf_counter()
+        self.fases.append((fase, (agora - self._ultimo) * 1000))
+        self._ultimo = agora
+
+    @contextmanager
+    def fase(self, nome):
+        if not self.ativo:
+            yield
+            return
+        inicio = time.perf_counter()
+        try:
+            yield
+        finally:
+            agora = time.perf_counter()
+            self.fases.append((nome, (agora - inicio) * 1000))
+            self._ultimo = agora
+
+    def exibir(self):
+        """Mostra as fases em um painel recolhido e grava no trace, se configurado"""
+        if not self.ativo:
+            return
+        total_ms = (time.perf_counter() - self._inicio) * 1000
+        with st.expander(f"⏱️ Perfil da renderização: {total_ms:.1f} ms", expanded=False):
+            st.dataframe(
+                [{"Fase": nome, "ms": round(ms, 2), "%": round(100 * ms / total_ms, 1) if total_ms else 0}
+                 for nome, ms in self.fases],
+                use_container_width=True,
+                hide_index=True,
+            )
+        if ARQUIVO_TRACE:
+            registro = {
+                'quando': datetime.now().isoformat(timespec='milliseconds'),
+                'pagina': self.pagina,
+                'total_ms': round(total_ms, 3),
+                'fases': [{'fase': nome, 'ms': round(ms, 3)} for nome, ms in self.fases],
+            }
+            try:
+                with _lock_arquivo, open(ARQUIVO_TRACE, 'a', encoding='utf-8') as f:
+                    f.write(json.dumps(registro, ensure_ascii=False) + "\n")
+            except OSError as e:
+                print(f"Erro ao gravar trace de perfil: {str(e)}")
+
+def iniciar_perfil(pagina):
+    """Cria o perfil da renderização atual; chamar logo após st.set_page_config"""
+    return PerfilPagina(pagina, ATIVO or st.query_params.get("perfil") == "1")
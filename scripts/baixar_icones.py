@@ -0,0 +1,21 @@
+import os
+import sys
+
+# Permite rodar a partir da raiz do projeto: python scripts/baixar_icones.py
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import CATEGORIAS_EQUIPAMENTOS, get_equipamentos
+from icones import loja_icones
+
+def main():
+    # Todos os itens do equipment_mapping.json mais a mochila fixa dos cards
+    item_ids = ['T8_BAG@4']
+    for categoria in CATEGORIAS_EQUIPAMENTOS:
+        item_ids.extend(item['id'] for item in get_equipamentos(categoria))
+    item_ids = list(dict.fromkeys(item_ids))
+
+    disponiveis = loja_icones.pre_carregar(item_ids)
+    print(f"{disponiveis} de {len(item_ids)} ícones disponíveis em {loja_icones.diretorio}")
+
+if __name__ == "__main__":
+    main()
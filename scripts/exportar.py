@@ -0,0 +1,36 @@
+import argparse
+import os
+import sys
+
+# Permite rodar a partir da raiz do projeto: python scripts/exportar.py ...
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from exportacao import COLUNAS_EXPORTACAO, FORMATOS, TAMANHO_BLOCO, exportar_tabela
+from database import usar_guilda
+
+def main():
+    parser = argparse.ArgumentParser(description="Exporta tabelas do albion.db para CSV ou Parquet")
+    parser.add_argument("tabela", choices=sorted(COLUNAS_EXPORTACAO))
+    parser.add_argument("destino", help="arquivo de saída (.csv ou .parquet)")
+    parser.add_argument("--formato", choices=FORMATOS, help="padrão: extensão do destino")
+    parser.add_argument("--personagem")
+    parser.add_argument("--inicio", help="data inicial (AAAA-MM-DD)")
+    parser.add_argument("--fim", help="data final (AAAA-MM-DD)")
+    parser.add_argument("--bloco", type=int, default=TAMANHO_BLOCO, help="linhas lidas por vez")
+    parser.add_argument("--guilda", help="banco da guilda (padrão: data/albion.db)")
+    args = parser.parse_args()
+    usar_guilda(args.guilda)
+
+    total = exportar_tabela(
+        args.tabela,
+        args.destino,
+        formato=args.formato,
+        tamanho_bloco=args.bloco,
+        personagem=args.personagem,
+        data_inicio=args.inicio,
+        data_fim=args.fim,
+    )
+    print(f"{total} linhas exportadas para {args.destino}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,37 @@
+import argparse
+import os
+import sys
+
+# Permite rodar a partir da raiz do projeto: python scripts/importar.py ...
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from importacao import COLUNAS_IMPORTACAO, TAMANHO_LOTE, importar_arquivo
+from database import usar_guilda
+
+def main():
+    parser = argparse.ArgumentParser(description="Importa hunts e mortes de arquivos CSV ou JSONL")
+    parser.add_argument("tabela", choices=sorted(COLUNAS_IMPORTACAO))
+    parser.add_argument("arquivo", help="arquivo .csv ou .jsonl")
+    parser.add_argument("--lote", type=int, default=TAMANHO_LOTE, help="registros por transação")
+    parser.add_argument("--recomecar", action="store_true", help="ignora o progresso salvo e importa desde o início")
+    parser.add_argument("--guilda", help="banco da guilda (padrão: data/albion.db)")
+    args = parser.parse_args()
+    usar_guilda(args.guilda)
+
+    def ao_progredir(lidos, importados, segundos):
+        taxa = importados / segundos if segundos > 0 else 0
+        print(f"{lidos} linhas lidas, {importados} importadas ({taxa:,.0f} registros/s)", flush=True)
+
+    resultado = importar_arquivo(args.arquivo, args.tabela, args.lote, args.recomecar, ao_progredir)
+
+    for numero, erro in resultado['erros']:
+        print(f"Linha {numero}: {erro}", file=sys.stderr)
+    if resultado['pulados']:
+        print(f"{resultado['pulados']} linhas já importadas anteriormente foram puladas")
+    print(
+        f"Importação concluída: {resultado['importados']} registros em {resultado['segundos']:.1f}s "
+        f"({resultado['registros_por_segundo']:,.0f} registros/s), {resultado['invalidos']} inválidos"
+    )
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+# Séries temporais de lucro líquido por personagem, agregadas por dia, semana ou mês
+
+from collections import namedtuple
+
+import pandas as pd
+
+from cache import cache_consulta
+from database import lucro_diario
+
+# Período -> frequência do pandas; semanas de segunda a domingo
+PERIODOS = {
+    'dia': 'D',
+    'semana': 'W-SUN',
+    'mes': 'M',
+}
+
+# Tamanho padrão da média móvel, em períodos (7 dias no período 'dia')
+JANELA_PADRAO = 7
+
+# Três DataFrames com o mesmo índice (início de cada período) e uma coluna por personagem
+SerieLucro = namedtuple('SerieLucro', ['lucro', 'media_movel', 'acumulado'])
+
+def agrupar_por_periodo(diario, periodo='dia'):
+    """
+    Converte as linhas (data, personagem, lucro) de database.lucro_diario em uma tabela
+    período x personagem. Períodos sem atividade entram com zero, para a média móvel
+    e o acumulado seguirem o tempo corrido e não só os dias com registro.
+    """
+    if periodo not in PERIODOS:
+        raise ValueError(f"Período desconhecido: {periodo}")
+    if diario.empty:
+        return pd.DataFrame(index=pd.DatetimeIndex([], name='data'), dtype='int64')
+    frequencia = PERIODOS[periodo]
+    tabela = (
+        diario.assign(periodo=diario['data'].dt.to_period(frequencia))
+        .groupby(['periodo', 'personagem'], observed=True)['lucro'].sum()
+        .unstack(fill_value=0)
+    )
+    intervalo = pd.period_range(tabela.index.min(), tabela.index.max(), freq=frequencia)
+    tabela = tabela.reindex(intervalo, fill_value=0)
+    tabela.index = intervalo.start_time.rename('data')
+    tabela.columns = tabela.columns.astype(str)
+    tabela.columns.name = None
+    return tabela
+
+@cache_consulta('hunts_solo', 'hunts_grupo', 'mortes')
+def serie_lucro(periodo='dia', janela=JANELA_PADRAO, personagem=None, data_inicio=None, data_fim=None):
+    """
+    Lucro líquido por período e personagem, com média móvel de `janela` períodos
+    e soma acumulada desde o início do intervalo filtrado.
+    Lê os agregados diários (estatisticas_diarias), então o custo depende de dias x personagens.
+    """
+    lucro = agrupar_por_periodo(
+        lucro_diario(personagem=personagem, data_inicio=data_inicio, data_fim=data_fim),
+        periodo,
+    )
+    return SerieLucro(
+        lucro=lucro,
+        media_movel=lucro.rolling(janela, min_periods=1).mean(),
+        acumulado=lucro.cumsum(),
+    )
@@ -0,0 +1,28 @@
+# Roteamento de cada sessão do Streamlit para o banco (shard) da sua guilda
+
+import streamlit as st
+
+from database import garantir_db, listar_guildas, usar_guilda
+
+def guilda_da_sessao():
+    """Guilda escolhida na sessão: ?guilda=nome na URL tem precedência sobre a escolha guardada"""
+    guilda = st.query_params.get("guilda") or st.session_state.get("guilda")
+    return guilda or None
+
+def iniciar_sessao():
+    """
+    Roteia a sessão para o banco da sua guilda e garante o schema desse banco.
+    Só guildas com shard existente são aceitas: um nome vindo da URL nunca cria arquivo
+    (a criação fica com a ação "Criar e usar" do main.py).
+    Deve ser a primeira operação de banco de cada página, a cada rerun.
+    Retorna a guilda em uso (None para o banco padrão).
+    """
+    guilda = guilda_da_sessao()
+    if guilda and guilda not in listar_guildas():
+        st.error(f"Guilda não encontrada: {guilda!r}. Usando o banco padrão.")
+        st.query_params.pop("guilda", None)
+        guilda = None
+    usar_guilda(guilda)
+    st.session_state.guilda = guilda
+    garantir_db()
+    return guilda